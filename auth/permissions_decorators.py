@@ -9,19 +9,71 @@ from typing import Callable, Optional
 from fastapi import Depends, HTTPException, Request
 from fastapi.responses import RedirectResponse
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from data.user import User, UserRole
 from dependencies import get_session
 from infrastructure import cookie_auth
-from services.user_service import get_user_by_id
 
 
 def get_current_user_from_request(request: Request, session: Session) -> Optional[User]:
-    """Get current user from request using your existing cookie auth"""
-    user_id = cookie_auth.get_user_id_via_auth_cookie(request)
-    if not user_id:
+    """Get current user from request, resolved once per request via cookie auth"""
+    return cookie_auth.get_user_via_auth_cookie(request, session)
+
+
+def _check_permission(
+    kwargs: dict,
+    required_role: UserRole,
+    redirect_url: str,
+    current_user: Optional[User] = None,
+):
+    """
+    Check the current user against required_role using the route's kwargs.
+    Returns a redirect for template routes, raises for API routes, or returns
+    None if the user may proceed.
+    """
+    # Try to get current_user from kwargs (dependency injection)
+    current_user = current_user or kwargs.get("current_user")
+    request = kwargs.get("request")
+    session = kwargs.get("session")
+
+    # If we have request and session but no current_user, try to get it from cookie
+    if not current_user and request and session:
+        current_user = get_current_user_from_request(request, session)
+
+    if not current_user:
+        # If template route, redirect to login
+        if request and hasattr(request, "url"):
+            return RedirectResponse(url=redirect_url, status_code=302)
+        else:
+            # If API route, return 401
+            raise HTTPException(status_code=401, detail="Authentication required")
+
+    if not current_user.has_permission(required_role):
+        if request and hasattr(request, "url"):
+            # For template routes, redirect to unauthorised page
+            return RedirectResponse(url="/unauthorised", status_code=302)
+        else:
+            # For API routes, return 403
+            raise HTTPException(
+                status_code=403,
+                detail=f"Insufficient permissions. Required: {required_role.value}",
+            )
+
+    return None
+
+
+async def _current_user_async(kwargs: dict) -> Optional[User]:
+    """The cookie's user for async routes that only take an async_session"""
+    request = kwargs.get("request")
+    async_session = kwargs.get("async_session")
+    if (
+        request is None
+        or kwargs.get("session") is not None
+        or not isinstance(async_session, AsyncSession)
+    ):
         return None
-    return get_user_by_id(session, user_id)
+    return await cookie_auth.get_user_via_auth_cookie_async(request, async_session)
 
 
 def require_permission(required_role: UserRole, redirect_url: str = "/login"):
@@ -29,51 +81,40 @@ def require_permission(required_role: UserRole, redirect_url: str = "/login"):
     Decorator to require specific permission level for routes.
     Can be used with both API endpoints and template routes.
 
+    The wrapper keeps the sync/async nature of the route, so FastAPI still runs
+    sync routes (and this permission check) in its threadpool rather than
+    blocking the event loop.
+
     Args:
         required_role: Minimum role required to access the route
         redirect_url: URL to redirect to if user is not authenticated (for template routes)
     """
 
     def decorator(func: Callable) -> Callable:
-        @wraps(func)
-        async def wrapper(*args, **kwargs):
-            # Try to get current_user from kwargs (dependency injection)
-            current_user = kwargs.get("current_user")
-            request = kwargs.get("request")
-            session = kwargs.get("session")
-
-            # If we have request and session but no current_user, try to get it from cookie
-            if not current_user and request and session:
-                current_user = get_current_user_from_request(request, session)
-
-            if not current_user:
-                # If template route, redirect to login
-                if request and hasattr(request, "url"):
-                    return RedirectResponse(url=redirect_url, status_code=302)
-                else:
-                    # If API route, return 401
-                    raise HTTPException(
-                        status_code=401, detail="Authentication required"
-                    )
-
-            if not current_user.has_permission(required_role):
-                if request and hasattr(request, "url"):
-                    # For template routes, redirect to unauthorised page
-                    return RedirectResponse(url="/unauthorised", status_code=302)
-                else:
-                    # For API routes, return 403
-                    raise HTTPException(
-                        status_code=403,
-                        detail=f"Insufficient permissions. Required: {required_role.value}",
-                    )
-
-            # return await func(*args, **kwargs)
-            if asyncio.iscoroutinefunction(func):
+        if asyncio.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                denied = _check_permission(
+                    kwargs,
+                    required_role,
+                    redirect_url,
+                    await _current_user_async(kwargs),
+                )
+                if denied:
+                    return denied
                 return await func(*args, **kwargs)
-            else:
-                return func(*args, **kwargs)
 
-        return wrapper
+            return async_wrapper
+
+        @wraps(func)
+        def sync_wrapper(*args, **kwargs):
+            denied = _check_permission(kwargs, required_role, redirect_url)
+            if denied:
+                return denied
+            return func(*args, **kwargs)
+
+        return sync_wrapper
 
     return decorator
 
@@ -0,0 +1,41 @@
+"""
+One-time database bootstrap: create any missing tables and the first
+superadmin (from SUPER_ADMIN_NAME / _EMAIL / _PASSWORD) if there are no users.
+
+Run once per deploy rather than in every worker:
+
+    python bootstrap.py
+
+Workers only do this themselves when BOOTSTRAP_ON_STARTUP is true (the
+default, for development).
+"""
+
+from sqlmodel import Session, SQLModel
+
+import data.vineyard  # noqa: F401 - registers every table with SQLModel.metadata
+from config import SETTINGS
+from database import engine
+from services import user_service
+
+
+def create_schema():
+    SQLModel.metadata.create_all(engine)
+
+
+def create_superadmin():
+    with Session(engine) as session:
+        user_service.create_first_superadmin(
+            session,
+            SETTINGS.super_admin_name,
+            SETTINGS.super_admin_email,
+            SETTINGS.super_admin_password,
+        )
+
+
+def bootstrap():
+    create_schema()
+    create_superadmin()
+
+
+if __name__ == "__main__":
+    bootstrap()
@@ -17,6 +17,63 @@ class Settings(BaseSettings):
     super_admin_password: Optional[str] = None
     deploy: Optional[str] = None
 
+    # Create tables and the first superadmin in every worker at startup. Turn
+    # off in production and run `python bootstrap.py` once per deploy instead.
+    bootstrap_on_startup: bool = True
+    # Budget for importing main:app, checked by deploy/check_import_time.py
+    import_time_budget_ms: int = 2000
+
+    # sha512_crypt cost. Existing hashes with other rounds are rehashed on
+    # their next successful login.
+    password_hash_rounds: int = 172_434
+    # Concurrent hashes per worker, and how many more may wait before logins
+    # are turned away with a 429
+    password_hash_workers: int = 2
+    password_hash_queue_limit: int = 8
+
+    # Connection pools, sized per gunicorn worker. The connection budget: each
+    # worker may hold pool_size + max_overflow sync connections, plus
+    # async_pool_size + async_max_overflow async ones, plus one for the cache
+    # invalidation listener - 21 with these defaults, so the 4 workers in
+    # deploy/systemd use at most 84 of Postgres's default max_connections of
+    # 100, leaving room for migrations, bootstrap and psql.
+    database_pool_size: int = 5
+    database_max_overflow: int = 10
+    database_async_pool_size: int = 2
+    database_async_max_overflow: int = 3
+    database_pool_timeout: int = 30
+    database_pool_pre_ping: bool = True
+    database_pool_recycle: int = 1800
+    database_statement_timeout_ms: int = 0
+    # Log every SQL statement (debugging only)
+    database_echo: bool = False
+
+    # Seconds a worker may serve a cached vineyard map before rebuilding it
+    map_cache_ttl_seconds: int = 300
+    # Seconds a worker may serve cached form lookups (growth stages,
+    # operators, chemicals, varieties) before reloading them
+    reference_data_ttl_seconds: int = 600
+    # Listen for cache invalidations from the other workers (LISTEN/NOTIFY).
+    # Only worth turning off when running a single worker.
+    cache_invalidation_listener_enabled: bool = True
+    # Rendered HTMX partials kept per worker (0 turns the fragment cache off)
+    fragment_cache_max_entries: int = 2000
+
+    # Compile every template at worker startup, keeping the compiled modules
+    # in template_cache_dir (relative to the app) across restarts
+    template_precompile_enabled: bool = True
+    template_cache_dir: str = ".template_cache"
+
+    # Event loop blocking detector (development / staging only)
+    loop_monitor_enabled: bool = False
+    loop_monitor_threshold_ms: int = 100
+
+    # Per-request SQL counter, Server-Timing header and N+1 detector.
+    # Strict mode raises on N+1 patterns instead of logging them (for tests).
+    query_counter_enabled: bool = False
+    query_counter_threshold: int = 10
+    query_counter_strict: bool = False
+
     model_config = SettingsConfigDict(env_file=".env")
 
 
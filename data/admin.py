@@ -1,5 +1,6 @@
 from sqladmin import ModelView
 from sqladmin.fields import AjaxSelectMultipleField
+from starlette.concurrency import run_in_threadpool
 from wtforms.validators import Optional
 
 from data.user import User
@@ -18,10 +19,21 @@ from data.vineyard import (
     Vineyard,
     WineColour,
 )
+from infrastructure import invalidation_bus
+
+
+class ReferenceDataAdminMixin:
+    """For models cached by reference_data_service: drop the cache on writes"""
+
+    async def after_model_change(self, data, model, is_created, request):
+        await run_in_threadpool(invalidation_bus.publish, model.__tablename__, model.id)
+
+    async def after_model_delete(self, model, request):
+        await run_in_threadpool(invalidation_bus.publish, model.__tablename__, model.id)
 
 
 # ---------- USER ----------
-class UserAdmin(ModelView, model=User):
+class UserAdmin(ReferenceDataAdminMixin, ModelView, model=User):
     column_list = [
         User.id,
         User.name,
@@ -49,7 +61,7 @@ class VineyardAdmin(ModelView, model=Vineyard):
     ]  # Exclude boundary from form (complex geometry)
 
 
-class VarietyAdmin(ModelView, model=Variety):
+class VarietyAdmin(ReferenceDataAdminMixin, ModelView, model=Variety):
     column_list = [Variety.id, Variety.name, Variety.wine_colour_id]
     column_filters = [Variety.wine_colour_id]
     column_searchable_list = [Variety.name]
@@ -58,7 +70,7 @@ class VarietyAdmin(ModelView, model=Variety):
     form_ajax_refs = {"wine_colour": {"fields": [WineColour.name]}}
 
 
-class WineColourAdmin(ModelView, model=WineColour):
+class WineColourAdmin(ReferenceDataAdminMixin, ModelView, model=WineColour):
     column_list = [WineColour.id, WineColour.name]
     column_searchable_list = [WineColour.name]
     form_columns = [WineColour.name]
@@ -216,7 +228,7 @@ class SprayRecordAdmin(ModelView, model=SprayRecord):
     }
 
 
-class ChemicalAdmin(ModelView, model=Chemical):
+class ChemicalAdmin(ReferenceDataAdminMixin, ModelView, model=Chemical):
     column_list = [
         Chemical.id,
         Chemical.name,
@@ -252,7 +264,7 @@ class ChemicalAdmin(ModelView, model=Chemical):
     }
 
 
-class GrowthStageAdmin(ModelView, model=GrowthStage):
+class GrowthStageAdmin(ReferenceDataAdminMixin, ModelView, model=GrowthStage):
     column_list = [
         GrowthStage.id,
         GrowthStage.el_number,
@@ -25,8 +25,20 @@ class Vineyard(SQLModel, table=True):
         sa_column=sa.Column(Geometry("POLYGON", srid=4326)),
         description="Vineyard boundary as a polygon in WGS84 (EPSG:4326)",
     )
+    date_updated: Optional[datetime.datetime] = Field(
+        default=None,
+        sa_column=sa.Column(
+            sa.DateTime,
+            default=datetime.datetime.now,
+            onupdate=datetime.datetime.now,
+            server_default=sa.func.now(),
+        ),
+    )
 
-    management_units: List["ManagementUnit"] = Relationship(back_populates="vineyard")
+    management_units: List["ManagementUnit"] = Relationship(
+        back_populates="vineyard",
+        sa_relationship_kwargs={"order_by": "ManagementUnit.sort_key"},
+    )
 
     def __str__(self):
         return f"{self.name}"
@@ -140,13 +152,34 @@ class Status(SQLModel, table=True):
         return f"{self.status}"
 
 
+MANAGEMENT_UNIT_SORT_KEY_SQL = (
+    "lpad(coalesce(substring(name from '[0-9]+'), '9999999999'), 10, '0')"
+    " || lower(name)"
+)
+
+
 class ManagementUnit(SQLModel, table=True):
     __tablename__ = "management_units"
+    __table_args__ = (
+        sa.Index("ix_management_units_vineyard_id_sort_key", "vineyard_id", "sort_key"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str = Field(index=True)
     variety_name_modifier: Optional[str] = Field(default=None)
 
+    # Natural sort key generated by Postgres from the name, so "2" < "3" < "3a"
+    # < "3b" < "10". The first number is zero padded, then the lowercased name
+    # breaks ties. Names without a number sort after all numbered units.
+    sort_key: Optional[str] = Field(
+        default=None,
+        sa_column=sa.Column(
+            sa.String,
+            sa.Computed(MANAGEMENT_UNIT_SORT_KEY_SQL, persisted=True),
+            index=True,
+        ),
+    )
+
     area: Decimal = Field(sa_column=sa.Column(sa.Numeric(5, 2)))
     row_width: Decimal = Field(sa_column=sa.Column(sa.Numeric(2, 1)))
     vine_spacing: Decimal = Field(sa_column=sa.Column(sa.Numeric(2, 1)))
@@ -162,6 +195,15 @@ class ManagementUnit(SQLModel, table=True):
         sa_column=sa.Column(Geometry("POLYGON", srid=4326)),
         description="Management unit area as a polygon in WGS84 (EPSG:4326)",
     )
+    date_updated: Optional[datetime.datetime] = Field(
+        default=None,
+        sa_column=sa.Column(
+            sa.DateTime,
+            default=datetime.datetime.now,
+            onupdate=datetime.datetime.now,
+            server_default=sa.func.now(),
+        ),
+    )
 
     spray_records: List["SprayRecord"] = Relationship(back_populates="management_unit")
 
@@ -335,6 +377,15 @@ class Spray(SQLModel, table=True):
     date_created: datetime.datetime = Field(
         sa_column=sa.Column(sa.DateTime, default=datetime.datetime.now, index=True)
     )
+    date_updated: Optional[datetime.datetime] = Field(
+        default=None,
+        sa_column=sa.Column(
+            sa.DateTime,
+            default=datetime.datetime.now,
+            onupdate=datetime.datetime.now,
+            server_default=sa.func.now(),
+        ),
+    )
 
     growth_stage_id: int | None = Field(foreign_key="growth_stages.id", index=True)
 
@@ -396,6 +447,21 @@ class WindDirection(str, enum.Enum):
 
 class SprayRecord(SQLModel, table=True):
     __tablename__ = "spray_records"
+    __table_args__ = (
+        sa.UniqueConstraint(
+            "management_unit_id",
+            "spray_id",
+            name="uq_sprayrecord_management_unit_spray",
+        ),
+        # Full spray history keyset order, per management unit
+        sa.Index(
+            "ix_spray_records_management_unit_id_history",
+            "management_unit_id",
+            sa.text("date_completed DESC NULLS LAST"),
+            sa.text("date_created DESC NULLS LAST"),
+            sa.text("id DESC"),
+        ),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     operator_id: int | None = Field(foreign_key="users.id", nullable=True, index=True)
@@ -687,6 +753,16 @@ class Chemical(SQLModel, table=True):
         default=None, sa_column=sa.Column(sa.Enum(ActiveIngredientUnit))
     )
 
+    date_updated: Optional[datetime.datetime] = Field(
+        default=None,
+        sa_column=sa.Column(
+            sa.DateTime,
+            default=datetime.datetime.now,
+            onupdate=datetime.datetime.now,
+            server_default=sa.func.now(),
+        ),
+    )
+
     chemical_groups: List[ChemicalGroup] | None = Relationship(
         back_populates="chemicals", link_model=ChemicalGroupLink
     )
@@ -1,10 +1,57 @@
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlmodel import Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from config import SETTINGS
+from infrastructure.pool_stats import InstrumentedAsyncQueuePool, InstrumentedQueuePool
 
 database_url = f"{SETTINGS.database_type}://{SETTINGS.database_user}:{SETTINGS.database_password}@{SETTINGS.database_host}:{SETTINGS.database_port}/{SETTINGS.database_name}"
 
-engine = create_engine(database_url, echo=True)
+connect_args = {}
+if SETTINGS.database_statement_timeout_ms:
+    # Applied server side to every statement on the connection
+    connect_args["options"] = (
+        f"-c statement_timeout={SETTINGS.database_statement_timeout_ms}"
+    )
+
+engine = create_engine(
+    database_url,
+    echo=SETTINGS.database_echo,
+    poolclass=InstrumentedQueuePool,
+    pool_size=SETTINGS.database_pool_size,
+    max_overflow=SETTINGS.database_max_overflow,
+    pool_timeout=SETTINGS.database_pool_timeout,
+    pool_pre_ping=SETTINGS.database_pool_pre_ping,
+    pool_recycle=SETTINGS.database_pool_recycle,
+    connect_args=connect_args,
+)
 
 SessionLocal = sessionmaker(bind=engine, class_=Session, expire_on_commit=False)
+
+# Async engine for async routes, on the same database via asyncpg. It has its
+# own, smaller pool; see the connection budget in config.py.
+async_database_url = make_url(database_url).set(drivername="postgresql+asyncpg")
+
+async_connect_args = {}
+if SETTINGS.database_statement_timeout_ms:
+    async_connect_args["server_settings"] = {
+        "statement_timeout": str(SETTINGS.database_statement_timeout_ms)
+    }
+
+async_engine = create_async_engine(
+    async_database_url,
+    echo=SETTINGS.database_echo,
+    poolclass=InstrumentedAsyncQueuePool,
+    pool_size=SETTINGS.database_async_pool_size,
+    max_overflow=SETTINGS.database_async_max_overflow,
+    pool_timeout=SETTINGS.database_pool_timeout,
+    pool_pre_ping=SETTINGS.database_pool_pre_ping,
+    pool_recycle=SETTINGS.database_pool_recycle,
+    connect_args=async_connect_args,
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, expire_on_commit=False
+)
@@ -7,12 +7,12 @@ from typing import Optional
 
 from fastapi import Depends, HTTPException, Request
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from config import Settings
 from data.user import User
-from database import SessionLocal
-from infrastructure.cookie_auth import get_user_id_via_auth_cookie
-from services.user_service import get_user_by_id
+from database import AsyncSessionLocal, SessionLocal
+from infrastructure.cookie_auth import get_user_via_auth_cookie
 
 
 @lru_cache
@@ -28,18 +28,16 @@ def get_session():
         db.close()
 
 
+async def get_async_session() -> AsyncSession:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def get_current_user(
     request: Request,
     session: Session = Depends(get_session),
-    user_id: Optional[int] = None,
 ) -> Optional[User]:
-    user_id = get_user_id_via_auth_cookie(request)
-
-    if not user_id:
-        return None
-
-    user = get_user_by_id(session, user_id)
-    return user
+    return get_user_via_auth_cookie(request, session)
 
 
 def get_current_user_required(current_user: User = Depends(get_current_user)) -> User:
@@ -0,0 +1,77 @@
+"""
+Check how long importing main:app takes against IMPORT_TIME_BUDGET_MS.
+
+Imports main in a fresh interpreter (as a gunicorn worker does), prints the
+import time and the slowest top-level imports, and exits non-zero when over
+budget. Run from the app directory, with the same environment as the service:
+
+    python deploy/check_import_time.py
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(APP_DIR))
+
+from config import SETTINGS  # noqa: E402
+
+TIMED_IMPORT = (
+    "import time; started = time.perf_counter(); import main; "
+    "print((time.perf_counter() - started) * 1000)"
+)
+
+
+def slowest_imports(importtime_log: str, count: int = 10) -> list[tuple[int, str]]:
+    """Direct imports of main by cumulative microseconds"""
+    # -X importtime lists each module after its own imports, indented two
+    # spaces per level, so main's direct imports are the level 1 lines just
+    # before the "main" line
+    imports: list[tuple[int, str]] = []
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        name = name[1:]
+        level = (len(name) - len(name.lstrip())) // 2
+        if level == 0:
+            if name == "main":
+                return sorted(imports, reverse=True)[:count]
+            imports = []
+        elif level == 1:
+            imports.append((int(cumulative), name.strip()))
+    return []
+
+
+def run(*options: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *options, "-c", TIMED_IMPORT],
+        cwd=APP_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def main() -> int:
+    # Timed without -X importtime, which slows imports down noticeably
+    try:
+        import_ms = float(run().stdout.strip().splitlines()[-1])
+    except subprocess.CalledProcessError as error:
+        print(error.stderr, file=sys.stderr)
+        return error.returncode
+    budget_ms = SETTINGS.import_time_budget_ms
+    print(f"main:app imported in {import_ms:.0f} ms (budget {budget_ms} ms)")
+
+    for cumulative, name in slowest_imports(run("-X", "importtime").stderr):
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    if import_ms > budget_ms:
+        print("Over budget", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
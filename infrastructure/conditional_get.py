@@ -0,0 +1,111 @@
+"""
+Conditional GET (ETag / If-None-Match) for pages built from a data version.
+
+The ETag is a hash of the page's data version (see data_version_service), the
+logged-in user (their name and role change the page) and the templates and
+viewmodels deployed. When the browser already holds that version the route
+answers 304 before any viewmodel is built or template rendered.
+"""
+
+import asyncio
+import hashlib
+from functools import lru_cache, wraps
+from pathlib import Path
+from typing import Callable, Optional
+
+from fastapi import Response
+
+from infrastructure import cookie_auth
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Cached copies must be revalidated every time, and belong to the user
+CACHE_HEADERS = {"Cache-Control": "private, no-cache", "Vary": "Cookie"}
+
+
+def conditional_get(data_version: Callable, id_param: str):
+    """
+    Decorator for template routes, placed between the permission decorator and
+    @fastapi_chameleon.template. data_version(session, id) is called with the
+    route's session and its id_param argument; a None version (missing row)
+    skips the ETag and lets the route handle it.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                etag = _etag(kwargs, data_version, id_param)
+                if etag and etag_matches(kwargs["request"], etag):
+                    return _not_modified(etag)
+                return _with_etag(await func(*args, **kwargs), etag)
+
+            return async_wrapper
+
+        @wraps(func)
+        def sync_wrapper(*args, **kwargs):
+            etag = _etag(kwargs, data_version, id_param)
+            if etag and etag_matches(kwargs["request"], etag):
+                return _not_modified(etag)
+            return _with_etag(func(*args, **kwargs), etag)
+
+        return sync_wrapper
+
+    return decorator
+
+
+def _etag(kwargs: dict, data_version: Callable, id_param: str) -> Optional[str]:
+    request, session = kwargs["request"], kwargs["session"]
+    version = data_version(session, kwargs[id_param])
+    if version is None:
+        return None
+
+    user = cookie_auth.get_user_via_auth_cookie(request, session)
+    viewer = (user.id, user.name, user.role) if user else None
+    key = repr((version, viewer, _deployment()))
+    return f'W/"{hashlib.sha1(key.encode()).hexdigest()}"'
+
+
+def etag_matches(request, etag: str) -> bool:
+    """True if the request's If-None-Match names etag, for answering 304"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as for If-None-Match
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in tags
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, **CACHE_HEADERS})
+
+
+def _with_etag(response, etag: Optional[str]):
+    # Only successful renders - not redirects or error pages
+    if etag and isinstance(response, Response) and response.status_code == 200:
+        response.headers["ETag"] = etag
+        response.headers.update(CACHE_HEADERS)
+    return response
+
+
+@lru_cache
+def _deployment() -> str:
+    """
+    Fingerprint of the templates and viewmodels on disk, so a deploy that
+    changes how pages look invalidates the browser's copies. The same on every
+    worker of a deploy.
+    """
+    files = sorted(
+        path
+        for folder in ("templates", "viewmodels")
+        for path in (BASE_DIR / folder).rglob("*")
+        if path.suffix in {".pt", ".py"}
+    )
+    digest = hashlib.sha1()
+    for path in files:
+        stat = path.stat()
+        digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()
@@ -2,11 +2,18 @@ import hashlib
 from typing import Optional
 
 from fastapi import Request, Response
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from data.user import User
 from infrastructure.num_convert import try_int
+from services.user_service import get_user_by_id, get_user_by_id_async
 
 auth_cookie_name = "aha_account"
 
+# Marks request.state.current_user as not yet resolved (None means anonymous)
+_UNRESOLVED = object()
+
 
 def set_auth(response: Response, user_id: int):
     hash_val = __hash_text(str(user_id))
@@ -40,5 +47,37 @@ def get_user_id_via_auth_cookie(request: Request) -> Optional[int]:
     return try_int(user_id)
 
 
+def get_user_via_auth_cookie(request: Request, session: Session) -> Optional[User]:
+    """
+    Resolve the logged-in user for this request, verifying the auth cookie and
+    loading the user at most once. The result (including None for anonymous
+    requests) is kept on request.state and reused by later callers.
+    """
+    current_user = getattr(request.state, "current_user", _UNRESOLVED)
+    if current_user is not _UNRESOLVED:
+        return current_user
+
+    user_id = get_user_id_via_auth_cookie(request)
+    current_user = get_user_by_id(session, user_id) if user_id else None
+
+    request.state.current_user = current_user
+    return current_user
+
+
+async def get_user_via_auth_cookie_async(
+    request: Request, session: AsyncSession
+) -> Optional[User]:
+    """Async version of get_user_via_auth_cookie, sharing its per-request result"""
+    current_user = getattr(request.state, "current_user", _UNRESOLVED)
+    if current_user is not _UNRESOLVED:
+        return current_user
+
+    user_id = get_user_id_via_auth_cookie(request)
+    current_user = await get_user_by_id_async(session, user_id) if user_id else None
+
+    request.state.current_user = current_user
+    return current_user
+
+
 def logout(response: Response):
     response.delete_cookie(auth_cookie_name)
@@ -0,0 +1,186 @@
+"""
+Per-worker cache of rendered Chameleon partials.
+
+HTMX swaps the same rows (spray rows, management unit rows, note rows) in and
+out over and over with data that rarely changes. A cached partial is keyed by
+its template and a version key from the route. Version keys come from
+version(table, key), a counter bumped whenever the invalidation bus reports a
+committed write to that row - in this worker or any other - so a stale
+fragment is never looked up again and ages out of the LRU.
+"""
+
+import asyncio
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import wraps
+from typing import Callable, Hashable, Optional
+
+import fastapi_chameleon
+from fastapi import Response
+from fastapi.responses import HTMLResponse
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
+
+from config import SETTINGS
+from data.vineyard import ManagementUnit, Spray, SprayChemical
+from infrastructure import invalidation_bus
+
+
+@dataclass(frozen=True)
+class FragmentCacheStats:
+    entries: int
+    max_entries: int
+    hits: int
+    misses: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups * 100 if lookups else 0.0
+
+
+class FragmentCache:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._fragments: OrderedDict[tuple, str] = OrderedDict()
+        # (table, key) -> bumps, and table -> bumps of the whole table
+        self._versions: dict[tuple[str, int], int] = {}
+        self._generations: dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def version(self, table: str, key: int) -> tuple[int, int]:
+        return self._generations.get(table, 0), self._versions.get((table, key), 0)
+
+    def bump(self, table: str, key: Optional[int] = None):
+        with self._lock:
+            if key is None:
+                self._generations[table] = self._generations.get(table, 0) + 1
+            else:
+                self._versions[(table, key)] = self._versions.get((table, key), 0) + 1
+
+    def get(self, template_file: str, version_key: Hashable) -> Optional[str]:
+        with self._lock:
+            html = self._fragments.get((template_file, version_key))
+            if html is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._fragments.move_to_end((template_file, version_key))
+            return html
+
+    def put(self, template_file: str, version_key: Hashable, html: str):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._fragments[(template_file, version_key)] = html
+            while len(self._fragments) > self.max_entries:
+                self._fragments.popitem(last=False)
+
+    def stats(self) -> FragmentCacheStats:
+        with self._lock:
+            return FragmentCacheStats(
+                len(self._fragments), self.max_entries, self.hits, self.misses
+            )
+
+
+FRAGMENTS = FragmentCache(SETTINGS.fragment_cache_max_entries)
+
+
+def version(table: str, key: int) -> tuple[int, int]:
+    """Current version of one row, for use in a fragment's version key"""
+    return FRAGMENTS.version(table, key)
+
+
+def stats() -> FragmentCacheStats:
+    return FRAGMENTS.stats()
+
+
+def template(template_file: str, version_key: Callable[..., Hashable]):
+    """
+    Drop-in for @fastapi_chameleon.template on partial routes. version_key is
+    called with the route's arguments; on a hit the cached HTML is returned
+    without calling the route. Responses the route returns itself (redirects,
+    errors) are passed through and never cached.
+    """
+
+    def render(key: Hashable, template_data) -> Response:
+        if isinstance(template_data, Response):
+            return template_data
+        html = fastapi_chameleon.engine.render(template_file, **template_data)
+        FRAGMENTS.put(template_file, key, html)
+        return HTMLResponse(html)
+
+    def decorator(func: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                key = version_key(**kwargs)
+                html = FRAGMENTS.get(template_file, key)
+                if html is not None:
+                    return HTMLResponse(html)
+                return render(key, await func(*args, **kwargs))
+
+            return async_wrapper
+
+        @wraps(func)
+        def sync_wrapper(*args, **kwargs):
+            key = version_key(**kwargs)
+            html = FRAGMENTS.get(template_file, key)
+            if html is not None:
+                return HTMLResponse(html)
+            return render(key, func(*args, **kwargs))
+
+        return sync_wrapper
+
+    return decorator
+
+
+# Invalidation
+#
+# Committed writes to the rows behind the partials go out on the invalidation
+# bus, however they were made (routes, services, the admin). Spray record
+# writes are already published by tile_service.
+
+
+def _spray_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        invalidation_bus.mark(session, "sprays", target.id)
+
+
+def _spray_chemical_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None and target.spray_id is not None:
+        invalidation_bus.mark(session, "sprays", target.spray_id)
+
+
+def _management_unit_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        invalidation_bus.mark(session, "management_units", target.id)
+
+
+for _event in ("after_insert", "after_update", "after_delete"):
+    event.listen(Spray, _event, _spray_changed)
+    event.listen(SprayChemical, _event, _spray_chemical_changed)
+    event.listen(ManagementUnit, _event, _management_unit_changed)
+
+
+# Rows are bumped by id; a whole-table message (key None) bumps every row, as
+# do changes to the lookup tables the partials show names from.
+for _table in ("sprays", "management_units", "spray_records"):
+    invalidation_bus.subscribe(
+        _table, lambda key, table=_table: FRAGMENTS.bump(table, key)
+    )
+for _table, _dependant in (
+    ("chemicals", "sprays"),
+    ("growth_stages", "sprays"),
+    ("varieties", "management_units"),
+):
+    invalidation_bus.subscribe(
+        _table, lambda key, dependant=_dependant: FRAGMENTS.bump(dependant)
+    )
@@ -0,0 +1,184 @@
+"""
+Cross-worker cache invalidation over Postgres LISTEN/NOTIFY.
+
+Each gunicorn worker keeps its own in-process caches (vineyard maps, vector
+tiles, form reference data). A write marks the (table, key) it touched; the
+mark is sent as a NOTIFY in the writing transaction, so other workers only
+hear about committed changes, and is dispatched to this worker's subscribers
+once the commit succeeds. A listener thread in every worker receives the
+notifications and evicts the matching entries from its local caches.
+
+If the listener loses its connection, every subscriber is told to drop
+everything once it reconnects, since notifications sent meanwhile are lost.
+"""
+
+import json
+import logging
+import os
+import select
+import socket
+import threading
+from collections import defaultdict
+from typing import Callable, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session as OrmSession
+
+from database import engine
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "cache_invalidation"
+RECONNECT_SECONDS = 5
+
+# handler(key) - key is None for "everything in this table"
+Handler = Callable[[Optional[int]], None]
+
+_subscribers: dict[str, list[Handler]] = defaultdict(list)
+
+
+def subscribe(table: str, handler: Handler):
+    _subscribers[table].append(handler)
+
+
+def mark(session, table: str, key: Optional[int] = None):
+    """Queue an invalidation to go out when the session's transaction commits"""
+    session.info.setdefault("cache_invalidations", set()).add((table, key))
+
+
+def publish(table: str, key: Optional[int] = None):
+    """
+    Invalidate now, for writes that have already been committed: evict locally
+    and notify the other workers.
+    """
+    _dispatch(table, key)
+    with engine.connect() as connection:
+        _notify(connection, [(table, key)])
+        connection.commit()
+
+
+def _origin() -> str:
+    # Computed per call: gunicorn forks workers after the app module is imported
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _notify(connection, invalidations):
+    origin = _origin()
+    for table, key in invalidations:
+        payload = json.dumps({"table": table, "key": key, "origin": origin})
+        connection.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": CHANNEL, "payload": payload},
+        )
+
+
+def _dispatch(table: str, key: Optional[int]):
+    for handler in _subscribers.get(table, ()):
+        try:
+            handler(key)
+        except Exception:
+            logger.exception("Cache invalidation handler failed for %s %s", table, key)
+
+
+def _dispatch_all():
+    for table in list(_subscribers):
+        _dispatch(table, None)
+
+
+# Session integration
+
+
+@event.listens_for(OrmSession, "before_commit")
+def _notify_before_commit(session):
+    # Flush first so marks from the final flush go out in this transaction
+    session.flush()
+    invalidations = session.info.get("cache_invalidations")
+    if invalidations:
+        _notify(session.connection(), sorted(invalidations, key=repr))
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _dispatch_committed(session):
+    for table, key in session.info.pop("cache_invalidations", ()):
+        _dispatch(table, key)
+
+
+@event.listens_for(OrmSession, "after_rollback")
+def _discard_rolled_back(session):
+    session.info.pop("cache_invalidations", None)
+
+
+# Listener
+
+
+class Listener:
+    """Daemon thread holding one LISTEN connection for this worker"""
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="cache-invalidation-listener", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=RECONNECT_SECONDS + 1)
+
+    def _run(self):
+        connected_before = False
+        while not self._stop.is_set():
+            connection = None
+            try:
+                connection = self._connect()
+                if connected_before:
+                    # Anything sent while we were away was missed
+                    _dispatch_all()
+                connected_before = True
+                self._receive(connection)
+            except Exception:
+                logger.exception("Cache invalidation listener failed, reconnecting")
+                self._stop.wait(RECONNECT_SECONDS)
+            finally:
+                if connection is not None:
+                    connection.close()
+
+    def _connect(self):
+        # A dedicated connection, detached so it doesn't hold a pool slot
+        pooled = engine.raw_connection()
+        pooled.detach()
+        connection = pooled.driver_connection
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {CHANNEL}")
+        return connection
+
+    def _receive(self, connection):
+        origin = _origin()
+        while not self._stop.is_set():
+            readable, _, _ = select.select([connection], [], [], RECONNECT_SECONDS)
+            if not readable:
+                continue
+            connection.poll()
+            while connection.notifies:
+                notification = connection.notifies.pop(0)
+                message = json.loads(notification.payload)
+                # This worker dispatched its own writes when they committed
+                if message.get("origin") != origin:
+                    _dispatch(message["table"], message.get("key"))
+
+
+LISTENER = Listener()
+
+
+def install(app):
+    """Listen for other workers' invalidations while the app is running"""
+    app.add_event_handler("startup", LISTENER.start)
+    app.add_event_handler("shutdown", LISTENER.stop)
@@ -0,0 +1,175 @@
+"""
+Opt-in event loop blocking detector for development and staging.
+
+A heartbeat task on the event loop wakes every `interval` seconds. A watchdog
+thread notices when the heartbeat is late by more than the threshold and
+captures the stack of the event loop thread plus the route of the request
+whose task was running at the time. When the loop resumes, the block is logged
+and kept in a bounded list shown on the superadmin loop blocks page.
+"""
+
+import asyncio
+import datetime
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class LoopBlock:
+    occurred_at: datetime.datetime
+    duration_ms: int
+    route: str
+    stack: str
+
+
+class LoopMonitor:
+    def __init__(self, threshold_ms: int = 100, max_events: int = 200):
+        self.threshold = threshold_ms / 1000
+        # Check a few times per threshold so the stack is captured mid-block
+        self.interval = max(self.threshold / 4, 0.005)
+        self.events: deque[LoopBlock] = deque(maxlen=max_events)
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._running = False
+        self._last_tick = time.monotonic()
+        self._pending: Optional[tuple[str, str]] = None
+        self._task_routes: dict[asyncio.Task, dict] = {}
+
+    # Lifecycle
+
+    async def start(self):
+        if self._running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._running = True
+
+        self._heartbeat_task = asyncio.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(
+            target=self._watch, name="loop-monitor", daemon=True
+        )
+        self._watchdog.start()
+        logger.info(
+            "Event loop monitor started (threshold %d ms)", self.threshold * 1000
+        )
+
+    async def stop(self):
+        self._running = False
+        if self._heartbeat_task:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+
+    # Request tracking
+
+    def track(self, task: asyncio.Task, scope: dict):
+        self._task_routes[task] = scope
+
+    def untrack(self, task: asyncio.Task):
+        self._task_routes.pop(task, None)
+
+    def _route_for(self, task: Optional[asyncio.Task]) -> str:
+        scope = self._task_routes.get(task) if task else None
+        if not scope:
+            return "(no request)"
+        route = scope.get("route")
+        path = getattr(route, "path", None) or scope.get("path", "")
+        return f"{scope.get('method', '')} {path}".strip()
+
+    # Loop and watchdog
+
+    async def _heartbeat(self):
+        while self._running:
+            started = time.monotonic()
+            self._last_tick = started
+            await asyncio.sleep(self.interval)
+
+            lag = time.monotonic() - started - self.interval
+            if lag > self.threshold:
+                route, stack = self._pending or ("(unknown)", "")
+                self._record(lag, route, stack)
+            self._pending = None
+
+    def _watch(self):
+        while self._running:
+            time.sleep(self.interval)
+            late_by = time.monotonic() - self._last_tick - self.interval
+            if late_by <= self.threshold or self._pending is not None:
+                continue
+
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame else ""
+            try:
+                task = asyncio.current_task(self._loop)
+            except RuntimeError:
+                task = None
+            self._pending = (self._route_for(task), stack)
+
+    def _record(self, lag: float, route: str, stack: str):
+        block = LoopBlock(
+            occurred_at=datetime.datetime.now(),
+            duration_ms=int(lag * 1000),
+            route=route,
+            stack=stack,
+        )
+        self.events.appendleft(block)
+        logger.warning(
+            "Event loop blocked for %d ms by %s\n%s",
+            block.duration_ms,
+            block.route,
+            block.stack,
+        )
+
+
+class LoopMonitorMiddleware:
+    """
+    Pure ASGI middleware recording which route each request task is serving,
+    so a block can be attributed to the request running on the loop.
+    """
+
+    def __init__(self, app, monitor: LoopMonitor):
+        self.app = app
+        self.monitor = monitor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        task = asyncio.current_task()
+        self.monitor.track(task, scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.monitor.untrack(task)
+
+
+MONITOR: Optional[LoopMonitor] = None
+
+
+def install(app, threshold_ms: int):
+    """Attach the monitor to the app. Only called when enabled in Settings."""
+    global MONITOR
+    MONITOR = LoopMonitor(threshold_ms=threshold_ms)
+    app.add_middleware(LoopMonitorMiddleware, monitor=MONITOR)
+    app.add_event_handler("startup", MONITOR.start)
+    app.add_event_handler("shutdown", MONITOR.stop)
+
+
+def recent_blocks() -> list[LoopBlock]:
+    return list(MONITOR.events) if MONITOR else []
+
+
+def is_enabled() -> bool:
+    return MONITOR is not None
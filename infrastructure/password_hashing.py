@@ -0,0 +1,123 @@
+"""
+Password hashing off the event loop, with bounded concurrency.
+
+sha512_crypt at the configured rounds takes a noticeable fraction of a second
+of CPU, and holds the GIL while it does, so a thread would still stall the
+event loop. Hashing and verification run in a small pool of processes started
+on first use; at most password_hash_workers run at once and
+password_hash_queue_limit more may wait. Beyond that HashingBusy is raised
+straight away (answered with a 429) rather than letting a burst of logins
+queue up behind each other.
+
+A pool process that dies (the OOM killer, say) breaks the whole pool. The
+broken pool is replaced and the job tried once more in the new one.
+"""
+
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional, TypeVar
+
+from passlib.handlers.sha2_crypt import sha512_crypt
+
+from config import SETTINGS
+
+T = TypeVar("T")
+
+RETRY_AFTER_SECONDS = 2
+
+# Hashes made with other rounds still verify, and need_rehash() reports them
+crypto = sha512_crypt.using(
+    rounds=SETTINGS.password_hash_rounds,
+    min_desired_rounds=SETTINGS.password_hash_rounds,
+    max_desired_rounds=SETTINGS.password_hash_rounds,
+)
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+# Running plus waiting jobs
+_slots = threading.BoundedSemaphore(
+    SETTINGS.password_hash_workers + SETTINGS.password_hash_queue_limit
+)
+
+
+class HashingBusy(Exception):
+    """Every hashing worker is busy and the queue is full"""
+
+
+async def hash_password(password: str) -> str:
+    return await _run(_hash, password, SETTINGS.password_hash_rounds)
+
+
+async def verify_password(password: str, password_hash: str) -> bool:
+    return await _run(_verify, password, password_hash)
+
+
+def needs_rehash(password_hash: str) -> bool:
+    """True if the hash was made with different parameters from the current ones"""
+    return crypto.needs_update(password_hash)
+
+
+def hash_password_blocking(password: str) -> str:
+    """For scripts and bootstrap, which have no event loop to keep free"""
+    return crypto.hash(password)
+
+
+# Run in the pool's processes, so module level and picklable
+
+
+def _hash(password: str, rounds: int) -> str:
+    return sha512_crypt.using(rounds=rounds).hash(password)
+
+
+def _verify(password: str, password_hash: str) -> bool:
+    try:
+        return sha512_crypt.verify(password, password_hash)
+    except ValueError:
+        # Not a hash this scheme recognises
+        return False
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Spawned rather than forked: the worker already has threads
+            _executor = ProcessPoolExecutor(
+                max_workers=SETTINGS.password_hash_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def _discard_executor(broken: ProcessPoolExecutor):
+    global _executor
+    with _executor_lock:
+        # Another request may already have replaced it
+        if _executor is broken:
+            _executor = None
+    broken.shutdown(wait=False)
+
+
+async def _run(func: Callable[..., T], *args) -> T:
+    executor = _get_executor()
+    try:
+        return await _run_in(executor, func, *args)
+    except BrokenProcessPool:
+        _discard_executor(executor)
+        return await _run_in(_get_executor(), func, *args)
+
+
+async def _run_in(executor: ProcessPoolExecutor, func: Callable[..., T], *args) -> T:
+    if not _slots.acquire(blocking=False):
+        raise HashingBusy()
+    try:
+        future = executor.submit(func, *args)
+    except BaseException:
+        _slots.release()
+        raise
+    # Released when the job finishes, even if the request gives up waiting
+    future.add_done_callback(lambda _: _slots.release())
+    return await asyncio.wrap_future(future)
@@ -0,0 +1,123 @@
+"""
+Connection pool instrumentation.
+
+Each gunicorn worker has its own engines and pools, so these numbers are per
+worker process. The sync and async engines' pools are counted separately and
+both shown on the superadmin database pool page.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PoolStatus:
+    name: str
+    pid: int
+    pool_size: int
+    max_overflow: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    checkouts: int
+    timeouts: int
+    wait_avg_ms: float
+    wait_p95_ms: float
+    wait_max_ms: float
+
+
+class PoolWaitStats:
+    def __init__(self, name: str, window: int = 500):
+        self.name = name
+        self._lock = threading.Lock()
+        self._recent: deque[float] = deque(maxlen=window)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record_wait(self, seconds: float):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += seconds
+            self.max_wait = max(self.max_wait, seconds)
+            self._recent.append(seconds)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def p95(self) -> float:
+        with self._lock:
+            recent = sorted(self._recent)
+        if not recent:
+            return 0.0
+        return recent[min(len(recent) - 1, int(len(recent) * 0.95))]
+
+
+STATS = PoolWaitStats("sync")
+ASYNC_STATS = PoolWaitStats("async")
+
+
+class _WaitRecordingPool:
+    """Records how long each checkout waited for a connection in stats"""
+
+    stats: PoolWaitStats
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.stats.record_timeout()
+            logger.warning(
+                "%s connection pool exhausted in worker %s: %s",
+                self.stats.name.capitalize(),
+                os.getpid(),
+                self.status(),
+            )
+            raise
+        self.stats.record_wait(time.perf_counter() - started)
+        return connection
+
+
+class InstrumentedQueuePool(_WaitRecordingPool, QueuePool):
+    """QueuePool for the sync engine, recording into STATS"""
+
+    stats = STATS
+
+
+class InstrumentedAsyncQueuePool(_WaitRecordingPool, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool for the async engine, recording into ASYNC_STATS"""
+
+    stats = ASYNC_STATS
+
+
+def pool_status(engine) -> PoolStatus:
+    """Status of a sync or async engine with an instrumented pool"""
+    pool = engine.pool
+    stats: PoolWaitStats = pool.stats
+    checkouts = stats.checkouts
+    return PoolStatus(
+        name=stats.name,
+        pid=os.getpid(),
+        pool_size=pool.size(),
+        max_overflow=getattr(pool, "_max_overflow", 0),
+        checked_in=pool.checkedin(),
+        checked_out=pool.checkedout(),
+        overflow=max(pool.overflow(), 0),
+        checkouts=checkouts,
+        timeouts=stats.timeouts,
+        wait_avg_ms=(stats.total_wait / checkouts * 1000) if checkouts else 0.0,
+        wait_p95_ms=stats.p95() * 1000,
+        wait_max_ms=stats.max_wait * 1000,
+    )
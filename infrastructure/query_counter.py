@@ -0,0 +1,151 @@
+"""
+Per-request SQL statement counter and N+1 detector.
+
+SQLAlchemy engine events count every statement and its time against the
+request currently being served. The totals go out in a `Server-Timing` header,
+and a request that runs the same statement shape more than the threshold is
+logged as a likely N+1, typically a lazy load from a template loop. In strict
+mode (for tests) the offending statement raises NPlusOneError instead.
+"""
+
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|\$\d+|\?")
+_PLACEHOLDER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class NPlusOneError(Exception):
+    pass
+
+
+def statement_shape(statement: str) -> str:
+    """SQL with parameters and expanded IN lists collapsed, for grouping"""
+    shape = _PLACEHOLDER.sub("?", statement)
+    shape = _PLACEHOLDER_LIST.sub("?, ...", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+class QueryStats:
+    def __init__(self, threshold: int, strict: bool = False):
+        self.threshold = threshold
+        self.strict = strict
+        self.count = 0
+        self.duration = 0.0
+        self.shapes: Counter[str] = Counter()
+
+    def record(self, statement: str, duration: float):
+        self.count += 1
+        self.duration += duration
+
+        shape = statement_shape(statement)
+        self.shapes[shape] += 1
+        if self.strict and self.shapes[shape] > self.threshold:
+            raise NPlusOneError(
+                f"Statement ran {self.shapes[shape]} times in one request: {shape}"
+            )
+
+    def repeated(self) -> list[tuple[str, int]]:
+        return [
+            (shape, count)
+            for shape, count in self.shapes.most_common()
+            if count > self.threshold
+        ]
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.duration * 1000:.1f};desc="{self.count} queries"'
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        context._query_counter_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = getattr(context, "_query_counter_started", None)
+    if stats is None or started is None:
+        return
+    stats.record(statement, time.perf_counter() - started)
+
+
+class QueryCounterMiddleware:
+    """
+    Pure ASGI middleware giving each request its own QueryStats and adding
+    the Server-Timing header once the response starts.
+    """
+
+    def __init__(self, app, threshold: int, strict: bool = False):
+        self.app = app
+        self.threshold = threshold
+        self.strict = strict
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats(threshold=self.threshold, strict=self.strict)
+        token = _current.set(stats)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", stats.server_timing().encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            for shape, count in stats.repeated():
+                logger.warning(
+                    "Possible N+1 on %s %s: statement ran %d times: %s",
+                    scope.get("method", ""),
+                    scope.get("path", ""),
+                    count,
+                    shape,
+                )
+
+
+def _listen():
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextmanager
+def count_queries(threshold: int, strict: bool = False) -> Iterator[QueryStats]:
+    """Count the statements run inside the block as one request, for tests"""
+    _listen()
+    stats = QueryStats(threshold=threshold, strict=strict)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def install(app, threshold: int, strict: bool = False):
+    """Attach the counter to the app. Only called when enabled in Settings."""
+    _listen()
+    app.add_middleware(QueryCounterMiddleware, threshold=threshold, strict=strict)
@@ -0,0 +1,63 @@
+"""
+Template precompilation and a persistent compiled-template cache.
+
+Chameleon compiles a .pt template to a Python module the first time it is
+rendered, separately in every worker, so the first requests after a deploy or
+reload are slow. use_cache_directory() points Chameleon at a directory that
+keeps the compiled modules across restarts; they are named by a digest of the
+template source and Chameleon version, so an edited template is simply
+compiled again. precompile() then cooks every template at worker startup,
+logging how long each took.
+"""
+
+import logging
+import time
+from pathlib import Path
+
+import fastapi_chameleon
+from chameleon.loader import ModuleLoader
+from chameleon.template import BaseTemplate
+
+logger = logging.getLogger(__name__)
+
+
+def use_cache_directory(path: Path):
+    """Keep compiled templates in path; call before any template is rendered"""
+    path.mkdir(parents=True, exist_ok=True)
+    # Chameleon only reads CHAMELEON_CACHE when it is first imported
+    BaseTemplate.loader = ModuleLoader(str(path))
+
+
+def precompile(template_folder: Path) -> dict[str, float]:
+    """
+    Compile every template into fastapi_chameleon's loader. Returns the
+    seconds taken per template; templates that fail are logged and skipped so
+    one bad partial doesn't stop the worker starting.
+    """
+    loader = fastapi_chameleon.engine.__templates
+    timings: dict[str, float] = {}
+    started = time.perf_counter()
+
+    for path in sorted(template_folder.rglob("*.pt")):
+        name = path.relative_to(template_folder).as_posix()
+        start = time.perf_counter()
+        try:
+            loader[name].cook_check()
+        except Exception:
+            logger.exception("Template %s failed to compile", name)
+            continue
+        timings[name] = time.perf_counter() - start
+        logger.info("Compiled template %s in %.1f ms", name, timings[name] * 1000)
+
+    logger.info(
+        "Compiled %d templates in %.0f ms",
+        len(timings),
+        (time.perf_counter() - started) * 1000,
+    )
+    return timings
+
+
+def install(app, template_folder: Path, cache_directory: Path):
+    """Persist compiled templates and compile them all as each worker starts"""
+    use_cache_directory(cache_directory)
+    app.add_event_handler("startup", lambda: precompile(template_folder))
@@ -0,0 +1,45 @@
+"""
+Invalidation for caches built from vineyard and management unit geometry.
+
+Any committed insert, update or delete of a vineyard or management unit,
+including the geometry writes from set_boundary_from_coordinates and
+set_area_polygon_from_coordinates, is marked on the invalidation bus as
+("vineyards", vineyard_id). A unit moved between vineyards marks both. The
+mapper events are registered once here, and caches (vineyard maps, vector
+tiles) subscribe through subscribe().
+"""
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import object_session
+
+from data.vineyard import ManagementUnit, Vineyard
+from infrastructure import invalidation_bus
+
+TABLE = "vineyards"
+
+
+def subscribe(handler: invalidation_bus.Handler):
+    """handler(vineyard_id) in every worker after a committed change; None for all"""
+    invalidation_bus.subscribe(TABLE, handler)
+
+
+def _vineyard_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        invalidation_bus.mark(session, TABLE, target.id)
+
+
+def _management_unit_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is None:
+        return
+    # A unit moved between vineyards changes both
+    moved_from = inspect(target).attrs.vineyard_id.history.deleted
+    for vineyard_id in (target.vineyard_id, *moved_from):
+        if vineyard_id is not None:
+            invalidation_bus.mark(session, TABLE, vineyard_id)
+
+
+for _event in ("after_insert", "after_update", "after_delete"):
+    event.listen(Vineyard, _event, _vineyard_changed)
+    event.listen(ManagementUnit, _event, _management_unit_changed)
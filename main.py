@@ -3,28 +3,17 @@ from pathlib import Path
 import fastapi_chameleon
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
-from sqladmin import Admin
-from sqlmodel import Session, SQLModel
 
+import bootstrap
 from config import SETTINGS
-from data.admin import (
-    ChemicalAdmin,
-    ChemicalGroupAdmin,
-    GrowthStageAdmin,
-    ManagementUnitAdmin,
-    SprayAdmin,
-    SprayChemicalAdmin,
-    SprayProgramAdmin,
-    SprayRecordAdmin,
-    SprayRecordChemicalAdmin,
-    StatusAdmin,
-    UserAdmin,
-    VarietyAdmin,
-    VineyardAdmin,
-    WineColourAdmin,
-)
 from database import engine
+from infrastructure import (
+    invalidation_bus,
+    loop_monitor,
+    password_hashing,
+    query_counter,
+    template_cache,
+)
 from routers import (
     account,
     administration,
@@ -32,9 +21,9 @@ from routers import (
     handlers,
     spray_programs,
     sprays,
+    tiles,
     vineyards,
 )
-from services import user_service
 
 # Initialise Fast API app
 
@@ -54,9 +43,28 @@ BASE_DIR = Path(__file__).resolve().parent
 template_folder = str(BASE_DIR / "templates")
 fastapi_chameleon.global_init(template_folder, auto_reload=dev_mode)
 
+if SETTINGS.template_precompile_enabled:
+    template_cache.install(
+        app, Path(template_folder), BASE_DIR / SETTINGS.template_cache_dir
+    )
+
+
+if SETTINGS.cache_invalidation_listener_enabled:
+    invalidation_bus.install(app)
+
+if SETTINGS.loop_monitor_enabled:
+    loop_monitor.install(app, threshold_ms=SETTINGS.loop_monitor_threshold_ms)
+
+if SETTINGS.query_counter_enabled or SETTINGS.query_counter_strict:
+    query_counter.install(
+        app,
+        threshold=SETTINGS.query_counter_threshold,
+        strict=SETTINGS.query_counter_strict,
+    )
 
 app.exception_handler(404)(handlers.not_found_error)
 app.exception_handler(500)(handlers.internal_error)
+app.exception_handler(password_hashing.HashingBusy)(handlers.hashing_busy)
 
 # routers
 
@@ -66,25 +74,37 @@ app.include_router(spray_programs.router)
 app.include_router(sprays.router)
 app.include_router(account.router)
 app.include_router(administration.router)
+app.include_router(tiles.router)
 
-# create db
-SQLModel.metadata.create_all(engine)
-
-# create superuser if no users exist
-with Session(engine) as session:
-    user_service.create_first_superadmin(
-        session,
-        SETTINGS.super_admin_name,
-        SETTINGS.super_admin_email,
-        SETTINGS.super_admin_password,
-    )
+# Schema and first superadmin - per worker only when BOOTSTRAP_ON_STARTUP is
+# set, otherwise run `python bootstrap.py` once per deploy
+if SETTINGS.bootstrap_on_startup:
+    app.add_event_handler("startup", bootstrap.bootstrap)
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 
-templates = Jinja2Templates(directory="templates")
+def mount_admin(app: FastAPI):
+    """The sqladmin model views - development only, so imported only here"""
+    from sqladmin import Admin
+
+    from data.admin import (
+        ChemicalAdmin,
+        ChemicalGroupAdmin,
+        GrowthStageAdmin,
+        ManagementUnitAdmin,
+        SprayAdmin,
+        SprayChemicalAdmin,
+        SprayProgramAdmin,
+        SprayRecordAdmin,
+        SprayRecordChemicalAdmin,
+        StatusAdmin,
+        UserAdmin,
+        VarietyAdmin,
+        VineyardAdmin,
+        WineColourAdmin,
+    )
 
-if SETTINGS.deploy != "True":
     admin = Admin(app, engine)
     admin.add_view(UserAdmin)
     admin.add_view(VineyardAdmin)
@@ -100,3 +120,7 @@ if SETTINGS.deploy != "True":
     admin.add_view(SprayChemicalAdmin)
     admin.add_view(SprayRecordChemicalAdmin)
     admin.add_view(SprayProgramAdmin)
+
+
+if SETTINGS.deploy != "True":
+    mount_admin(app)
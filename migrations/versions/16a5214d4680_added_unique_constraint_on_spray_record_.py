@@ -0,0 +1,73 @@
+"""added unique constraint on spray_record management_unit_id and spray_id
+
+Revision ID: 16a5214d4680
+Revises: 5ce06bff7d74
+Create Date: 2026-10-18 09:12:41.207315
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '16a5214d4680'
+down_revision: Union[str, Sequence[str], None] = '5ce06bff7d74'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Completed records carry the batch numbers (spray_record_chemicals
+    # cascade from them), so two completed records for the same unit and spray
+    # must be merged by hand before the constraint can go on.
+    completed_duplicates = op.get_bind().execute(
+        sa.text(
+            """
+            SELECT management_unit_id, spray_id, count(*)
+            FROM spray_records
+            WHERE complete
+            GROUP BY management_unit_id, spray_id
+            HAVING count(*) > 1
+            ORDER BY management_unit_id, spray_id
+            """
+        )
+    ).all()
+    if completed_duplicates:
+        pairs = ", ".join(
+            f"(management_unit_id={unit_id}, spray_id={spray_id}: {count} records)"
+            for unit_id, spray_id, count in completed_duplicates
+        )
+        raise RuntimeError(
+            "Cannot add uq_sprayrecord_management_unit_spray: more than one "
+            f"completed spray record for {pairs}. Merge or delete these by hand "
+            "and run the upgrade again."
+        )
+
+    # Remove the incomplete duplicates, keeping the completed record where there
+    # is one, otherwise the oldest. Completed records are never deleted.
+    op.execute(
+        """
+        DELETE FROM spray_records AS duplicate
+        USING spray_records AS keep
+        WHERE duplicate.management_unit_id = keep.management_unit_id
+          AND duplicate.spray_id = keep.spray_id
+          AND NOT COALESCE(duplicate.complete, false)
+          AND (COALESCE(keep.complete, false) OR keep.id < duplicate.id)
+        """
+    )
+    op.create_unique_constraint(
+        'uq_sprayrecord_management_unit_spray',
+        'spray_records',
+        ['management_unit_id', 'spray_id'],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint(
+        'uq_sprayrecord_management_unit_spray', 'spray_records', type_='unique'
+    )
@@ -0,0 +1,41 @@
+"""added spray history keyset index
+
+Revision ID: 4b7e2d9a0c13
+Revises: 8c1f0e6d2b97
+Create Date: 2026-10-18 15:02:47.318520
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b7e2d9a0c13'
+down_revision: Union[str, Sequence[str], None] = '8c1f0e6d2b97'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_spray_records_management_unit_id_history',
+        'spray_records',
+        [
+            'management_unit_id',
+            sa.text('date_completed DESC NULLS LAST'),
+            sa.text('date_created DESC'),
+            sa.text('id DESC'),
+        ],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        'ix_spray_records_management_unit_id_history', table_name='spray_records'
+    )
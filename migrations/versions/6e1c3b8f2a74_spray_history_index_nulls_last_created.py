@@ -0,0 +1,49 @@
+"""spray history index nulls last created
+
+Revision ID: 6e1c3b8f2a74
+Revises: 9d2f6a4c8e15
+Create Date: 2026-10-18 21:04:12.538201
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6e1c3b8f2a74'
+down_revision: Union[str, Sequence[str], None] = '9d2f6a4c8e15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _create_history_index(date_created_order: str) -> None:
+    op.create_index(
+        'ix_spray_records_management_unit_id_history',
+        'spray_records',
+        [
+            'management_unit_id',
+            sa.text('date_completed DESC NULLS LAST'),
+            sa.text(date_created_order),
+            sa.text('id DESC'),
+        ],
+        unique=False,
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_index(
+        'ix_spray_records_management_unit_id_history', table_name='spray_records'
+    )
+    _create_history_index('date_created DESC NULLS LAST')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        'ix_spray_records_management_unit_id_history', table_name='spray_records'
+    )
+    _create_history_index('date_created DESC')
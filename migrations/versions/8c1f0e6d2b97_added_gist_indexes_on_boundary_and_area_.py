@@ -0,0 +1,40 @@
+"""added gist indexes on boundary and area_polygon
+
+Revision ID: 8c1f0e6d2b97
+Revises: e3b9c4a17d52
+Create Date: 2026-10-18 13:41:09.662184
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c1f0e6d2b97'
+down_revision: Union[str, Sequence[str], None] = 'e3b9c4a17d52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The index creation in d11061a531f7 and bfb7fa768c2f was commented out,
+    # but databases built with create_all already have these (GeoAlchemy's
+    # spatial_index), so only create them where missing.
+    op.execute(
+        'CREATE INDEX IF NOT EXISTS idx_vineyards_boundary '
+        'ON vineyards USING gist (boundary)'
+    )
+    op.execute(
+        'CREATE INDEX IF NOT EXISTS idx_management_units_area_polygon '
+        'ON management_units USING gist (area_polygon)'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('DROP INDEX IF EXISTS idx_management_units_area_polygon')
+    op.execute('DROP INDEX IF EXISTS idx_vineyards_boundary')
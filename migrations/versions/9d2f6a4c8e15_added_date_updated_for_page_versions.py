@@ -0,0 +1,33 @@
+"""added date_updated for page versions
+
+Revision ID: 9d2f6a4c8e15
+Revises: 4b7e2d9a0c13
+Create Date: 2026-10-18 17:21:09.604117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d2f6a4c8e15'
+down_revision: Union[str, Sequence[str], None] = '4b7e2d9a0c13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('vineyards', sa.Column('date_updated', sa.DateTime(), server_default=sa.text('now()'), nullable=True))
+    op.add_column('management_units', sa.Column('date_updated', sa.DateTime(), server_default=sa.text('now()'), nullable=True))
+    op.add_column('sprays', sa.Column('date_updated', sa.DateTime(), server_default=sa.text('now()'), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('sprays', 'date_updated')
+    op.drop_column('management_units', 'date_updated')
+    op.drop_column('vineyards', 'date_updated')
@@ -0,0 +1,29 @@
+"""added date_updated to chemicals
+
+Revision ID: b4d8e2f6a1c3
+Revises: 6e1c3b8f2a74
+Create Date: 2026-10-18 23:12:47.381054
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4d8e2f6a1c3'
+down_revision: Union[str, Sequence[str], None] = '6e1c3b8f2a74'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('chemicals', sa.Column('date_updated', sa.DateTime(), server_default=sa.text('now()'), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('chemicals', 'date_updated')
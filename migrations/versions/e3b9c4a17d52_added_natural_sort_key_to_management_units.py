@@ -0,0 +1,58 @@
+"""added natural sort key to management units
+
+Revision ID: e3b9c4a17d52
+Revises: 16a5214d4680
+Create Date: 2026-10-18 11:02:37.514920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3b9c4a17d52'
+down_revision: Union[str, Sequence[str], None] = '16a5214d4680'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Generated column, so Postgres maintains it on every insert and update
+    op.add_column(
+        'management_units',
+        sa.Column(
+            'sort_key',
+            sa.String(),
+            sa.Computed(
+                "lpad(coalesce(substring(name from '[0-9]+'), '9999999999'), 10, '0')"
+                " || lower(name)",
+                persisted=True,
+            ),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        op.f('ix_management_units_sort_key'),
+        'management_units',
+        ['sort_key'],
+        unique=False,
+    )
+    op.create_index(
+        'ix_management_units_vineyard_id_sort_key',
+        'management_units',
+        ['vineyard_id', 'sort_key'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        'ix_management_units_vineyard_id_sort_key', table_name='management_units'
+    )
+    op.drop_index(op.f('ix_management_units_sort_key'), table_name='management_units')
+    op.drop_column('management_units', 'sort_key')
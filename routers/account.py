@@ -61,7 +61,7 @@ async def edit_post(
         return vm.to_dict()
 
     # Update the user
-    updated_user = user_service.update_user(
+    updated_user = await user_service.update_user(
         session=session,
         user_id=vm.user.id,
         name=vm.name,
@@ -139,7 +139,7 @@ async def login_post(request: Request, session: Session = Depends(get_session)):
     if vm.error:
         return vm.to_dict()
 
-    user = user_service.login_user(session, vm.email, vm.password)
+    user = await user_service.login_user(session, vm.email, vm.password)
     if not user:
         vm.error = "The account does not exist or the password is wrong."
         return vm.to_dict()
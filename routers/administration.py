@@ -22,6 +22,8 @@ from services.user_service import get_users_by_role
 from viewmodels.admin.admin_viewmodels import (
     AdminDashboardViewModel,
     ChemicalManagementViewModel,
+    DatabasePoolViewModel,
+    LoopBlocksViewModel,
     SprayProgressReportViewModel,
     UserManagementViewModel,
 )
@@ -141,7 +143,7 @@ async def users_new_post(
     ic(vm)
     ic(vm.password)
 
-    user = user_service.create_user(
+    user = await user_service.create_user_async(
         session=session,
         name=vm.name,
         email=vm.email,
@@ -202,7 +204,7 @@ async def users_edit_post(
     ic(vm)
 
     # Update the user
-    updated_user = user_service.update_user(
+    updated_user = await user_service.update_user(
         session=session,
         user_id=user_id,
         name=vm.name,
@@ -322,6 +324,26 @@ async def system_admin(
     )
 
 
+@router.get(
+    "/system/loop_blocks", response_class=HTMLResponse, include_in_schema=False
+)
+@require_superadmin()
+@fastapi_chameleon.template("admin/loop_blocks.pt")
+def loop_blocks(request: Request, session: Session = Depends(get_session)):
+    """Recent event loop blocks - superadmin only"""
+    vm = LoopBlocksViewModel(request, session)
+    return vm.to_dict()
+
+
+@router.get("/system/db_pool", response_class=HTMLResponse, include_in_schema=False)
+@require_superadmin()
+@fastapi_chameleon.template("admin/db_pool.pt")
+def db_pool(request: Request, session: Session = Depends(get_session)):
+    """Connection pool stats for this worker - superadmin only"""
+    vm = DatabasePoolViewModel(request, session)
+    return vm.to_dict()
+
+
 """ @router.delete("/users/{user_id}", include_in_schema=False)
 @require_admin()
 async def delete_user(
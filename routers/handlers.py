@@ -3,6 +3,7 @@ from fastapi import HTTPException, Request
 from fastapi.responses import JSONResponse
 
 from config import SETTINGS
+from infrastructure import password_hashing
 
 
 @fastapi_chameleon.template("errors/404.pt")
@@ -35,3 +36,13 @@ async def internal_error(request: Request, exc: Exception):
     except Exception:
         # Fallback if template fails
         return JSONResponse(status_code=500, content={"error": "Internal server error"})
+
+
+async def hashing_busy(request: Request, exc: password_hashing.HashingBusy):
+    response = fastapi_chameleon.response(
+        "errors/429.pt",
+        status_code=429,
+        message="Too many people are signing in right now. Please try again.",
+    )
+    response.headers["Retry-After"] = str(password_hashing.RETRY_AFTER_SECONDS)
+    return response
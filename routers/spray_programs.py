@@ -9,7 +9,7 @@ from starlette import status
 
 from auth import permissions_decorators
 from dependencies import get_session
-from services import spray_program_service, spray_service
+from services import spray_diary_service, spray_program_service, spray_service
 from viewmodels.spray_programs.create_viewmodel import CreateViewModel
 from viewmodels.spray_programs.details_viewmodel import DetailsViewModel
 from viewmodels.spray_programs.form_viewmodel import FormViewModel
@@ -60,6 +60,32 @@ def spray_program_details(
     return vm.to_dict()
 
 
+## GET Spray Program Spray Diary Export
+@router.get(
+    "/spray_programs/{spray_program_id}/spray_diary.{export_format}",
+    include_in_schema=False,
+)
+@permissions_decorators.require_admin()
+def spray_program_spray_diary_export(
+    request: Request,
+    spray_program_id: int,
+    export_format: str,
+    session: Session = Depends(get_session),
+):
+    """Every vineyard's spray diary for the program as CSV or XLSX"""
+    try:
+        spray_program = spray_program_service.get_spray_program_by_id(
+            session, spray_program_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return spray_diary_service.spray_diary_download(
+        export_format,
+        f"Spray diary {spray_program.name}",
+        spray_program_id=spray_program_id,
+    )
+
+
 ## POST Delete a Spray for a Spray Program
 @router.post("/spray_programs/{spray_program_id}/spray/{spray_id}/delete")
 @permissions_decorators.require_admin()
@@ -9,9 +9,10 @@ from sqlmodel import select
 from starlette import status
 
 from auth import permissions_decorators
-from data.vineyard import Chemical, Spray, SprayChemical, Target
+from data.vineyard import Spray, SprayChemical
 from dependencies import get_session
-from services import spray_record_service, spray_service, vineyard_service
+from infrastructure import fragment_cache
+from services import reference_data_service, spray_record_service, spray_service
 from viewmodels.shared.viewmodel import ViewModelBase
 from viewmodels.sprays.apply_select_units_form_viewmodel import (
     ApplySelectMUsFormViewModel,
@@ -42,12 +43,10 @@ def spray_index(request: Request, session: Session = Depends(get_session)):
 @router.get("/spray/chemical_row", response_class=HTMLResponse)
 @fastapi_chameleon.template("spray/_chemical_row.pt")
 def get_chemical_row(session: Session = Depends(get_session)):
-    statement = select(Chemical).order_by(Chemical.name)
-    chemicals = session.exec(statement).all()
-    targets = [target.value for target in Target]
-    if not chemicals:
+    reference_data = reference_data_service.reference_data(session)
+    if not reference_data.chemicals:
         raise HTTPException(status_code=404, detail="No chemicals found")
-    return {"chemicals": chemicals, "targets": targets}
+    return {"chemicals": reference_data.chemicals, "targets": reference_data.targets}
 
 
 # TODO refactor to use viewmodel / remove
@@ -60,8 +59,7 @@ def get_spray_row_as_form(spray_id: int, session: Session = Depends(get_session)
     if not spray:
         raise HTTPException(status_code=404, detail="No chemicals found")
 
-    statement = select(Chemical)
-    chemicals = session.exec(statement).all()
+    chemicals = reference_data_service.reference_data(session).chemicals
     if not chemicals:
         raise HTTPException(status_code=404, detail="No chemicals found")
 
@@ -71,7 +69,10 @@ def get_spray_row_as_form(spray_id: int, session: Session = Depends(get_session)
 # TODO refactor to use viewmodel / remove
 ## GET Spay program row
 @router.get("/spray/{spray_id}/view", response_class=HTMLResponse)
-@fastapi_chameleon.template("spray/_display_row.pt")
+@fragment_cache.template(
+    "spray/_display_row.pt",
+    lambda spray_id, **_: fragment_cache.version("sprays", spray_id),
+)
 def spray_view_inline(
     request: Request, spray_id: int, session: Session = Depends(get_session)
 ):
@@ -167,22 +168,12 @@ def add_program_to_all_units(
     if not spray:
         raise HTTPException(status_code=404, detail="Spray not found")
 
-    all_management_units = vineyard_service.get_all_management_units(session)
-
-    for mu in all_management_units:
-        if mu.is_active:
-            spray_record = spray_record_service.create_or_update_spray_record(
-                session, mu.id, spray_id
-            )
-            session.add(spray_record)
-        else:
-            print(f"################## Skipped {mu.name} ###################")
-
-    session.commit()
+    result = spray_record_service.apply_spray_to_management_units(session, spray_id)
 
     vm = ViewModelBase(request, session)
     vm.set_success(
-        f"Spray program <strong>{spray.name}</strong> applied to all active units."
+        f"Spray program <strong>{spray.name}</strong> applied to all active units "
+        f"({result.created} added, {result.skipped} already assigned)."
     )
 
     return vm.to_dict()
@@ -198,17 +189,14 @@ def add_program_to_all_red(
     if not spray:
         raise HTTPException(status_code=404, detail="Spray not found")
 
-    red_management_units = vineyard_service.get_red_management_units(session)
-    for mu in red_management_units:
-        spray_record = spray_record_service.create_or_update_spray_record(
-            session, mu.id, spray_id
-        )
-        session.add(spray_record)
-    session.commit()
+    result = spray_record_service.apply_spray_to_management_units(
+        session, spray_id, wine_colour="Red"
+    )
 
     vm = ViewModelBase(request, session)
     vm.set_success(
-        f"Spray program <strong>{spray.name}</strong> applied to all red units."
+        f"Spray program <strong>{spray.name}</strong> applied to all red units "
+        f"({result.created} added, {result.skipped} already assigned)."
     )
 
     return vm.to_dict()
@@ -224,17 +212,14 @@ def add_program_to_all_white(
     if not spray:
         raise HTTPException(status_code=404, detail="Spray not found")
 
-    white_management_units = vineyard_service.get_red_management_units(session)
-    for mu in white_management_units:
-        spray_record = spray_record_service.create_or_update_spray_record(
-            session, mu.id, spray_id
-        )
-        session.add(spray_record)
-    session.commit()
+    result = spray_record_service.apply_spray_to_management_units(
+        session, spray_id, wine_colour="White"
+    )
 
     vm = ViewModelBase(request, session)
     vm.set_success(
-        f"Spray program <strong>{spray.name}</strong> applied to all white units."
+        f"Spray program <strong>{spray.name}</strong> applied to all white units "
+        f"({result.created} added, {result.skipped} already assigned)."
     )
 
     return vm.to_dict()
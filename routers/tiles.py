@@ -0,0 +1,35 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import Response
+from sqlmodel import Session
+
+from auth.permissions_decorators import require_user
+from dependencies import get_session
+from services import tile_service
+
+router = APIRouter()
+
+MAX_ZOOM = 22
+
+
+@router.get("/tiles/{z}/{x}/{y}.mvt", include_in_schema=False)
+@require_user()
+def vector_tile(
+    request: Request,
+    z: int,
+    x: int,
+    y: int,
+    spray_id: Optional[int] = None,
+    session: Session = Depends(get_session),
+):
+    """Vineyard and management unit polygons as a Mapbox vector tile"""
+    if not 0 <= z <= MAX_ZOOM or not (0 <= x < 2**z and 0 <= y < 2**z):
+        raise HTTPException(status_code=404, detail="Tile not found")
+
+    tile = tile_service.get_tile(session, z, x, y, spray_id=spray_id)
+    return Response(
+        content=tile,
+        media_type="application/vnd.mapbox-vector-tile",
+        headers={"Cache-Control": "private, max-age=60"},
+    )
@@ -5,24 +5,34 @@ from urllib.parse import urlencode
 import fastapi
 import fastapi_chameleon
 from fastapi import APIRouter, Depends, Form, HTTPException, Request
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response
 from fastapi.responses import HTMLResponse as BaseHTMLResponse
 from icecream import ic
 from sqlalchemy.orm import Session
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from starlette import status
 
 from auth.permissions_decorators import require_admin, require_operator, require_user
-from dependencies import get_session
-from services import vineyard_service
+from dependencies import get_async_session, get_session
+from infrastructure import cookie_auth, fragment_cache
+from infrastructure.conditional_get import conditional_get, etag_matches
+from services import (
+    data_version_service,
+    map_service,
+    spray_diary_service,
+    vineyard_service,
+)
 from viewmodels.vineyards.details_viewmodel import DetailsViewModel
 from viewmodels.vineyards.edit_mu_viewmodel import EditMUViewModel
 from viewmodels.vineyards.list_viewmodel import ListViewModel
 from viewmodels.vineyards.mu_full_spray_history_viewmodel import (
+    MUFullSprayHistoryRecordsViewModel,
     MUFullSprayHistoryViewModel,
 )
 from viewmodels.vineyards.mu_spray_history_viewmodel import MUSprayHistoryViewModel
 from viewmodels.vineyards.vineyard_full_spray_history_viewmodel import (
+    VineyardFullSprayHistoryRecordsViewModel,
     VineyardFullSprayHistoryViewModel,
 )
 from viewmodels.vineyards.vineyard_spray_record_add_note import (
@@ -78,6 +88,7 @@ def vineyard_index(request: Request, session: Session = Depends(get_session)):
 
 @router.get("/vineyards/{vineyard_id}", response_class=HTMLResponse)
 @require_user()
+@conditional_get(data_version_service.vineyard_version, "vineyard_id")
 @fastapi_chameleon.template("vineyard/vineyard_details.pt")
 def vineyard_details(
     request: Request,
@@ -93,6 +104,45 @@ def vineyard_details(
     return vm.to_dict()
 
 
+@router.get("/vineyards/{vineyard_id}/map.geojson", include_in_schema=False)
+@require_user()
+def vineyard_map(
+    request: Request, vineyard_id: int, session: Session = Depends(get_session)
+):
+    """Vineyard boundary and management unit polygons as GeoJSON, with ETag"""
+    payload = map_service.vineyard_map(session, vineyard_id)
+    headers = {"ETag": payload.etag, "Cache-Control": "private, no-cache"}
+
+    if etag_matches(request, payload.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return Response(
+        content=payload.body,
+        media_type="application/geo+json",
+        headers=headers,
+    )
+
+
+@router.get("/management_unit/locate", include_in_schema=False)
+@require_user()
+def locate_management_unit(
+    request: Request,
+    lat: float,
+    lng: float,
+    vineyard_id: Optional[int] = None,
+    session: Session = Depends(get_session),
+):
+    """The management unit (and vineyard) at a GPS position, else the nearest"""
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise HTTPException(status_code=422, detail="Invalid coordinates")
+
+    location = map_service.locate_management_unit(session, lat, lng, vineyard_id)
+    if not location:
+        raise HTTPException(status_code=404, detail="No management units mapped")
+
+    return JSONResponse(location._asdict())
+
+
 @router.get(
     "/vineyards/{vineyard_id}/spray_records/{spray_id}/new",
     response_class=HTMLResponse,
@@ -103,9 +153,12 @@ async def vineyard_spray_records_form(
     request: Request,
     vineyard_id: int,
     spray_id: int,
-    session: Session = Depends(get_session),
+    async_session: AsyncSession = Depends(get_async_session),
 ):
-    vm = VineyardSprayRecordsFormViewModel(vineyard_id, spray_id, request, session)
+    vm = VineyardSprayRecordsFormViewModel(
+        vineyard_id, spray_id, request, async_session
+    )
+    await vm.load()
 
     return vm.to_dict()
 
@@ -128,7 +181,7 @@ async def submit_spray_records(
     relative_humidity: Annotated[Optional[int], Form()] = None,
     wind_speed: Annotated[Optional[int], Form()] = None,
     wind_direction: Annotated[Optional[str], Form()] = None,
-    session: Session = Depends(get_session),
+    async_session: AsyncSession = Depends(get_async_session),
 ):
     vm = VineyardSprayRecordsSubmitViewModel(
         vineyard_id=vineyard_id,
@@ -145,7 +198,7 @@ async def submit_spray_records(
         wind_direction=wind_direction,
         management_unit_ids=management_unit_ids,
         request=request,
-        session=session,
+        session=async_session,
     )
 
     await vm.load()
@@ -157,18 +210,30 @@ async def submit_spray_records(
         print(f"[Form Error] {vm.error}")
         return vm.to_dict()  # Render back in template using Chameleon
 
-    vm.process_submission()
+    await vm.process_submission()
+
+    if vm.error:
+        # The write was rolled back; show the form again with the error
+        print(f"[Submit Error] {vm.error}")
+        return vm.to_dict()
+
+    completion = (
+        await vineyard_service.spray_completion_for_vineyard_async(
+            session=async_session, vineyard_id=vineyard_id, spray_ids=[spray_id]
+        )
+    ).get(spray_id)
 
-    if vineyard_service.spray_complete_for_vineyard(
-        session=session, spray_id=spray_id, vineyard_id=vineyard_id
-    ):
+    if completion and completion.all_complete:
         response = fastapi.responses.RedirectResponse(
             f"/vineyards/{vineyard_id}",
             status_code=status.HTTP_302_FOUND,
         )
         return response
 
-    vm = VineyardSprayRecordsFormViewModel(vineyard_id, spray_id, request, session)
+    vm = VineyardSprayRecordsFormViewModel(
+        vineyard_id, spray_id, request, async_session
+    )
+    await vm.load()
 
     vm.set_success("Successfully created spray record")
 
@@ -237,7 +302,12 @@ async def vineyard_spray_record_add_note(
     response_class=HTMLResponse,
 )
 @require_admin()
-@fastapi_chameleon.template("vineyard/_vineyard_details_note_display.pt")
+@fragment_cache.template(
+    "vineyard/_vineyard_details_note_display.pt",
+    lambda spray_record_id, **_: fragment_cache.version(
+        "spray_records", spray_record_id
+    ),
+)
 async def vineyard_spray_record_cancel_note(
     request: Request,
     vineyard_id: int,
@@ -339,9 +409,11 @@ async def submit_spray_records(
 
     ic("###### Post-Submission #####")
 
-    if vineyard_service.spray_complete_for_vineyard(
-        session=session, spray_id=vm.spray_id, vineyard_id=vineyard_id
-    ):
+    completion = vineyard_service.spray_completion_for_vineyard(
+        session=session, vineyard_id=vineyard_id, spray_ids=[vm.spray_id]
+    ).get(vm.spray_id)
+
+    if completion and completion.all_complete:
         ic("#### REDIRECTED ####")
         params = urlencode({"success": "Spray record edited successfully"})
         response = fastapi.responses.RedirectResponse(
@@ -364,13 +436,38 @@ async def submit_spray_records(
     "/vineyards/{vineyard_id}/full_spray_history",
     response_class=HTMLResponse,
 )
+@conditional_get(data_version_service.vineyard_version, "vineyard_id")
 @fastapi_chameleon.template("vineyard/full_spray_history.pt")
 def vineyard_spray_history(
     request: Request,
     vineyard_id: int,
+    spray_program_id: Optional[str] = None,  # "" from the filter means all
+    session: Session = Depends(get_session),
+):
+    vm = VineyardFullSprayHistoryViewModel(
+        vineyard_id, request, session, _program_filter(spray_program_id)
+    )
+    return vm.to_dict()
+
+
+@router.get(
+    "/vineyards/{vineyard_id}/full_spray_history/records",
+    response_class=HTMLResponse,
+    include_in_schema=False,
+)
+@conditional_get(data_version_service.vineyard_version, "vineyard_id")
+@fastapi_chameleon.template("vineyard/_full_spray_history_records.pt")
+def vineyard_spray_history_records(
+    request: Request,
+    vineyard_id: int,
+    after: Optional[str] = None,
+    spray_program_id: Optional[str] = None,
     session: Session = Depends(get_session),
 ):
-    vm = VineyardFullSprayHistoryViewModel(vineyard_id, request, session)
+    """HTMX endpoint for the next page of spray history"""
+    vm = VineyardFullSprayHistoryRecordsViewModel(
+        vineyard_id, request, session, _program_filter(spray_program_id), after
+    )
     return vm.to_dict()
 
 
@@ -378,16 +475,71 @@ def vineyard_spray_history(
     "/management_unit/{management_unit_id}/full_spray_history",
     response_class=HTMLResponse,
 )
+@conditional_get(data_version_service.management_unit_version, "management_unit_id")
 @fastapi_chameleon.template("management_unit/full_spray_history.pt")
 def management_unit_full_spray_history(
     request: Request,
     management_unit_id: int,
+    spray_program_id: Optional[str] = None,  # "" from the filter means all
     session: Session = Depends(get_session),
 ):
-    vm = MUFullSprayHistoryViewModel(management_unit_id, request, session)
+    vm = MUFullSprayHistoryViewModel(
+        management_unit_id, request, session, _program_filter(spray_program_id)
+    )
     return vm.to_dict()
 
 
+@router.get(
+    "/management_unit/{management_unit_id}/full_spray_history/records",
+    response_class=HTMLResponse,
+    include_in_schema=False,
+)
+@conditional_get(data_version_service.management_unit_version, "management_unit_id")
+@fastapi_chameleon.template("management_unit/_full_spray_history_records.pt")
+def management_unit_full_spray_history_records(
+    request: Request,
+    management_unit_id: int,
+    after: Optional[str] = None,
+    spray_program_id: Optional[str] = None,
+    session: Session = Depends(get_session),
+):
+    """HTMX endpoint for the next page of spray history"""
+    vm = MUFullSprayHistoryRecordsViewModel(
+        management_unit_id, request, session, _program_filter(spray_program_id), after
+    )
+    return vm.to_dict()
+
+
+@router.get(
+    "/vineyards/{vineyard_id}/spray_diary.{export_format}", include_in_schema=False
+)
+@require_operator()
+def vineyard_spray_diary_export(
+    request: Request,
+    vineyard_id: int,
+    export_format: str,
+    spray_program_id: Optional[str] = None,
+    session: Session = Depends(get_session),
+):
+    """The vineyard's spray diary, optionally for one program, as CSV or XLSX"""
+    vineyard = vineyard_service.get_vineyard_by_id(session, vineyard_id)
+    return spray_diary_service.spray_diary_download(
+        export_format,
+        f"Spray diary {vineyard.name}",
+        vineyard_id=vineyard_id,
+        spray_program_id=_program_filter(spray_program_id),
+    )
+
+
+def _program_filter(spray_program_id: Optional[str]) -> Optional[int]:
+    if not spray_program_id:
+        return None
+    try:
+        return int(spray_program_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid spray program")
+
+
 @router.get(
     "/management_unit/{management_unit_id}/spray_history", response_class=HTMLResponse
 )
@@ -413,7 +565,14 @@ def mangement_unit_edit_inline(
 
 
 @router.get("/management_unit/{management_unit_id}/view", response_class=HTMLResponse)
-@fastapi_chameleon.template("management_unit/display_row.pt")
+@fragment_cache.template(
+    "management_unit/display_row.pt",
+    # The edit button is only shown to logged in users
+    lambda request, management_unit_id, **_: (
+        fragment_cache.version("management_units", management_unit_id),
+        cookie_auth.get_user_id_via_auth_cookie(request) is not None,
+    ),
+)
 def mangement_unit_view_inline(
     request: Request, management_unit_id: int, session: Session = Depends(get_session)
 ):
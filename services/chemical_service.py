@@ -1,10 +1,12 @@
 # services/chemical_service.py
 
+import datetime
 from typing import List, Optional
 
 from sqlmodel import Session, select
 
 from data.vineyard import Chemical, ChemicalGroup, MixRateUnit
+from infrastructure import invalidation_bus
 
 
 def get_chemical_by_id(session: Session, chemical_id: int) -> Optional[Chemical]:
@@ -64,6 +66,7 @@ def create_chemical(
                         chemical.chemical_groups = []
                     chemical.chemical_groups.append(group)
 
+        invalidation_bus.mark(session, "chemicals", chemical.id)
         session.commit()
         session.refresh(chemical)
         return chemical
@@ -114,6 +117,10 @@ def update_chemical(
                         chemical.chemical_groups = []
                     chemical.chemical_groups.append(group)
 
+        # A groups-only edit leaves the chemicals row itself unchanged
+        chemical.date_updated = datetime.datetime.now()
+
+        invalidation_bus.mark(session, "chemicals", chemical.id)
         session.commit()
         session.refresh(chemical)
         return chemical
@@ -132,6 +139,7 @@ def delete_chemical(session: Session, chemical_id: int) -> bool:
             return False
 
         session.delete(chemical)
+        invalidation_bus.mark(session, "chemicals", chemical_id)
         session.commit()
         return True
 
@@ -0,0 +1,108 @@
+from typing import Optional
+
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from data.vineyard import (
+    Chemical,
+    ManagementUnit,
+    Spray,
+    SprayChemical,
+    SprayRecord,
+    Vineyard,
+)
+
+# Data versions are cheap aggregates (latest date_updated and row counts) over
+# the rows a page is built from. Any committed insert, update or delete of
+# those rows changes the version, so it can stand in for the page content in
+# an ETag. Counts catch deletes, which leave no date_updated behind.
+#
+# Spray chemicals have no date_updated: editing a spray deletes and re-inserts
+# them, so their count and latest id change instead. The chemicals they
+# reference are included too, as their mix rates appear on the pages.
+#
+# Lookup tables (varieties, states, growth stages, programs, users) are not
+# included: they only change through the admin and rarely.
+
+
+def vineyard_version(session: Session, vineyard_id: int) -> Optional[tuple]:
+    """Version of the vineyard details and full spray history pages"""
+    unit_ids = select(ManagementUnit.id).where(
+        ManagementUnit.vineyard_id == vineyard_id
+    )
+    return _version(
+        session,
+        select(Vineyard.date_updated).where(Vineyard.id == vineyard_id),
+        select(func.count(), func.max(ManagementUnit.date_updated)).where(
+            ManagementUnit.vineyard_id == vineyard_id
+        ),
+        unit_ids,
+    )
+
+
+def management_unit_version(
+    session: Session, management_unit_id: int
+) -> Optional[tuple]:
+    """Version of the management unit spray history pages"""
+    return _version(
+        session,
+        select(Vineyard.date_updated)
+        .join(ManagementUnit, ManagementUnit.vineyard_id == Vineyard.id)
+        .where(ManagementUnit.id == management_unit_id),
+        select(func.count(), func.max(ManagementUnit.date_updated)).where(
+            ManagementUnit.id == management_unit_id
+        ),
+        select(ManagementUnit.id).where(ManagementUnit.id == management_unit_id),
+    )
+
+
+def _version(session: Session, vineyard, units, unit_ids) -> Optional[tuple]:
+    """
+    One round trip: the vineyard's date_updated, then count and latest
+    date_updated of the units, their spray records, those records' sprays and
+    the sprays' chemicals, and count and latest id of the spray chemicals.
+    None if the vineyard or unit doesn't exist.
+    """
+    units = units.subquery()
+    records = (
+        select(func.count(), func.max(SprayRecord.date_updated))
+        .where(SprayRecord.management_unit_id.in_(unit_ids))
+        .subquery()
+    )
+    spray_ids = select(SprayRecord.spray_id).where(
+        SprayRecord.management_unit_id.in_(unit_ids)
+    )
+    sprays = (
+        select(func.count(), func.max(Spray.date_updated))
+        .where(Spray.id.in_(spray_ids))
+        .subquery()
+    )
+    spray_chemicals = (
+        select(func.count(), func.max(SprayChemical.id))
+        .where(SprayChemical.spray_id.in_(spray_ids))
+        .subquery()
+    )
+    chemicals = (
+        select(func.count(), func.max(Chemical.date_updated))
+        .where(
+            Chemical.id.in_(
+                select(SprayChemical.chemical_id).where(
+                    SprayChemical.spray_id.in_(spray_ids)
+                )
+            )
+        )
+        .subquery()
+    )
+    row = session.exec(
+        select(
+            vineyard.scalar_subquery(),
+            *units.c,
+            *records.c,
+            *sprays.c,
+            *spray_chemicals.c,
+            *chemicals.c,
+        )
+    ).one()
+    if row[0] is None:
+        return None
+    return tuple(row)
@@ -0,0 +1,187 @@
+import hashlib
+import json
+import threading
+import time
+from typing import NamedTuple, Optional
+
+from fastapi import HTTPException
+from geoalchemy2 import Geography
+from sqlalchemy import JSON, cast, func
+from sqlmodel import Session, select
+
+from config import SETTINGS
+from data.vineyard import ManagementUnit, Variety, Vineyard, WineColour
+from infrastructure import vineyard_invalidation
+
+
+class VineyardMap(NamedTuple):
+    body: bytes
+    etag: str
+    built_at: float
+
+
+_cache: dict[int, VineyardMap] = {}
+# Bumped by every invalidation, so a map built from rows read before it is
+# returned but not cached
+_generation = 0
+_lock = threading.Lock()
+
+
+def vineyard_map(session: Session, vineyard_id: int) -> VineyardMap:
+    """
+    The vineyard boundary and all management unit polygons as one GeoJSON
+    FeatureCollection, cached per vineyard until a geometry write invalidates it.
+    """
+    with _lock:
+        cached = _cache.get(vineyard_id)
+        generation = _generation
+    if cached and time.monotonic() - cached.built_at < SETTINGS.map_cache_ttl_seconds:
+        return cached
+
+    body = json.dumps(_build_feature_collection(session, vineyard_id)).encode()
+    built = VineyardMap(
+        body=body,
+        etag=f'"{hashlib.sha1(body).hexdigest()}"',
+        built_at=time.monotonic(),
+    )
+    with _lock:
+        if generation == _generation:
+            _cache[vineyard_id] = built
+    return built
+
+
+def invalidate_vineyard_map(vineyard_id: int):
+    global _generation
+    with _lock:
+        _cache.pop(vineyard_id, None)
+        _generation += 1
+
+
+def _build_feature_collection(session: Session, vineyard_id: int) -> dict:
+    vineyard = session.exec(
+        select(
+            Vineyard.id,
+            Vineyard.name,
+            cast(func.ST_AsGeoJSON(Vineyard.boundary), JSON),
+            func.ST_Y(func.ST_Centroid(Vineyard.boundary)),
+            func.ST_X(func.ST_Centroid(Vineyard.boundary)),
+        ).where(Vineyard.id == vineyard_id)
+    ).one_or_none()
+    if not vineyard:
+        raise HTTPException(status_code=404, detail="Vineyard not found")
+
+    features = []
+    _, name, boundary, centroid_lat, centroid_lng = vineyard
+    if boundary:
+        features.append(
+            {
+                "type": "Feature",
+                "geometry": boundary,
+                "properties": {
+                    "kind": "vineyard",
+                    "id": vineyard_id,
+                    "name": name,
+                    "centroid": [centroid_lat, centroid_lng],
+                },
+            }
+        )
+
+    management_units = session.exec(
+        select(
+            ManagementUnit.id,
+            ManagementUnit.name,
+            Variety.name,
+            WineColour.name,
+            cast(func.ST_AsGeoJSON(ManagementUnit.area_polygon), JSON),
+        )
+        .outerjoin(Variety, Variety.id == ManagementUnit.variety_id)
+        .outerjoin(WineColour, WineColour.id == Variety.wine_colour_id)
+        .where(ManagementUnit.vineyard_id == vineyard_id)
+        .where(ManagementUnit.area_polygon.is_not(None))
+        .order_by(ManagementUnit.sort_key)
+    )
+    for mu_id, mu_name, variety, colour, polygon in management_units:
+        features.append(
+            {
+                "type": "Feature",
+                "geometry": polygon,
+                "properties": {
+                    "kind": "management_unit",
+                    "id": mu_id,
+                    "name": mu_name,
+                    "variety": variety,
+                    "colour": colour,
+                },
+            }
+        )
+
+    return {"type": "FeatureCollection", "features": features}
+
+
+GEOGRAPHY = Geography(srid=4326)
+
+
+class UnitLocation(NamedTuple):
+    management_unit_id: int
+    management_unit_name: str
+    vineyard_id: int
+    vineyard_name: str
+    contained: bool
+    distance_m: float
+
+
+def locate_management_unit(
+    session: Session, lat: float, lng: float, vineyard_id: Optional[int] = None
+) -> Optional[UnitLocation]:
+    """
+    The management unit containing a GPS point, or failing that the nearest one.
+    Both lookups are answered from the GIST index on area_polygon.
+    """
+    point = func.ST_SetSRID(func.ST_MakePoint(lng, lat), 4326)
+    statement = (
+        select(ManagementUnit.id, ManagementUnit.name, Vineyard.id, Vineyard.name)
+        .join(Vineyard, Vineyard.id == ManagementUnit.vineyard_id)
+        .where(ManagementUnit.area_polygon.is_not(None))
+        .limit(1)
+    )
+    if vineyard_id is not None:
+        statement = statement.where(ManagementUnit.vineyard_id == vineyard_id)
+
+    containing = session.exec(
+        statement.where(func.ST_Contains(ManagementUnit.area_polygon, point))
+    ).first()
+    if containing:
+        return UnitLocation(*containing, contained=True, distance_m=0.0)
+
+    # KNN ordering with <-> walks the index nearest first
+    distance = func.ST_Distance(
+        cast(ManagementUnit.area_polygon, GEOGRAPHY), cast(point, GEOGRAPHY)
+    )
+    nearest = session.exec(
+        statement.add_columns(distance).order_by(
+            ManagementUnit.area_polygon.op("<->")(point)
+        )
+    ).first()
+    if nearest:
+        *unit, distance_m = nearest
+        return UnitLocation(*unit, contained=False, distance_m=round(distance_m, 1))
+    return None
+
+
+# Invalidation
+#
+# A committed change to a vineyard or its management units drops that
+# vineyard's cached map in every worker.
+
+
+def _vineyard_invalidated(vineyard_id: Optional[int]):
+    global _generation
+    if vineyard_id is None:
+        with _lock:
+            _cache.clear()
+            _generation += 1
+    else:
+        invalidate_vineyard_map(vineyard_id)
+
+
+vineyard_invalidation.subscribe(_vineyard_invalidated)
@@ -0,0 +1,155 @@
+import threading
+import time
+from typing import NamedTuple, Optional
+
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from config import SETTINGS
+from data.user import User, UserRole
+from data.vineyard import (
+    Chemical,
+    GrowthStage,
+    MixRateUnit,
+    Target,
+    Variety,
+    WineColour,
+)
+from infrastructure import invalidation_bus
+
+# Snapshots of the lookup tables behind the spray forms. They are plain
+# immutable tuples rather than ORM objects, so they can be shared between
+# requests and threads and a template can never trigger a lazy load.
+
+
+class GrowthStageRef(NamedTuple):
+    id: int
+    el_number: int
+    description: str
+
+
+class OperatorRef(NamedTuple):
+    id: int
+    name: str
+
+
+class ChemicalRef(NamedTuple):
+    id: int
+    name: str
+    active_ingredient: str
+    rate_per_100l: Optional[int]
+    rate_unit: Optional[MixRateUnit]
+    withholding_period: Optional[str]
+
+
+class VarietyRef(NamedTuple):
+    id: int
+    name: str
+    wine_colour: Optional[str]
+
+
+class ReferenceData(NamedTuple):
+    growth_stages: tuple[GrowthStageRef, ...]
+    operators: tuple[OperatorRef, ...]
+    chemicals: tuple[ChemicalRef, ...]
+    varieties: tuple[VarietyRef, ...]
+    targets: tuple[str, ...]
+    loaded_at: float
+
+
+_snapshot: Optional[ReferenceData] = None
+# Bumped by invalidate() so a load racing with a write isn't kept
+_generation = 0
+_lock = threading.Lock()
+
+
+def reference_data(session: Session) -> ReferenceData:
+    """
+    Growth stages, operators, chemicals, varieties and targets, shared by the
+    whole process. Reloaded after reference_data_ttl_seconds, or on the next
+    call after invalidate().
+    """
+    snapshot = _fresh_snapshot()
+    if snapshot:
+        return snapshot
+
+    generation = _generation
+    loaded_at = time.monotonic()
+    rows = [session.exec(statement).all() for statement in _statements()]
+    return _keep(generation, _snapshot_from_rows(loaded_at, *rows))
+
+
+async def reference_data_async(session: AsyncSession) -> ReferenceData:
+    """Async version of reference_data, sharing the same snapshot"""
+    snapshot = _fresh_snapshot()
+    if snapshot:
+        return snapshot
+
+    generation = _generation
+    loaded_at = time.monotonic()
+    rows = [(await session.exec(statement)).all() for statement in _statements()]
+    return _keep(generation, _snapshot_from_rows(loaded_at, *rows))
+
+
+def _fresh_snapshot() -> Optional[ReferenceData]:
+    snapshot = _snapshot
+    age = time.monotonic() - snapshot.loaded_at if snapshot else None
+    if age is not None and age < SETTINGS.reference_data_ttl_seconds:
+        return snapshot
+    return None
+
+
+def _keep(generation: int, snapshot: ReferenceData) -> ReferenceData:
+    global _snapshot
+    with _lock:
+        if generation == _generation:
+            _snapshot = snapshot
+    return snapshot
+
+
+def invalidate():
+    """Drop the snapshot, after a write to any of the reference tables"""
+    global _snapshot, _generation
+    with _lock:
+        _snapshot = None
+        _generation += 1
+
+
+# Tables behind the snapshot, as published on the invalidation bus
+for _table in ("growth_stages", "users", "chemicals", "varieties", "wine_colours"):
+    invalidation_bus.subscribe(_table, lambda key: invalidate())
+
+
+def _statements():
+    return (
+        select(GrowthStage.id, GrowthStage.el_number, GrowthStage.description).order_by(
+            GrowthStage.el_number
+        ),
+        select(User.id, User.name)
+        .where(User.role == UserRole.OPERATOR)
+        .order_by(User.name),
+        select(
+            Chemical.id,
+            Chemical.name,
+            Chemical.active_ingredient,
+            Chemical.rate_per_100l,
+            Chemical.rate_unit,
+            Chemical.withholding_period,
+        ).order_by(Chemical.name),
+        select(Variety.id, Variety.name, WineColour.name)
+        .outerjoin(WineColour, WineColour.id == Variety.wine_colour_id)
+        .order_by(Variety.name),
+    )
+
+
+def _snapshot_from_rows(
+    loaded_at: float, growth_stages, operators, chemicals, varieties
+) -> ReferenceData:
+    return ReferenceData(
+        growth_stages=tuple(GrowthStageRef(*row) for row in growth_stages),
+        operators=tuple(OperatorRef(*row) for row in operators),
+        chemicals=tuple(ChemicalRef(*row) for row in chemicals),
+        varieties=tuple(VarietyRef(*row) for row in varieties),
+        targets=tuple(target.value for target in Target),
+        loaded_at=loaded_at,
+    )
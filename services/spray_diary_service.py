@@ -0,0 +1,196 @@
+import re
+from typing import Iterator, Optional
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, func
+from sqlmodel import Session, select
+
+from data.user import User
+from data.vineyard import (
+    Chemical,
+    ChemicalGroup,
+    ChemicalGroupLink,
+    GrowthStage,
+    ManagementUnit,
+    Spray,
+    SprayChemical,
+    SprayProgram,
+    SprayRecord,
+    SprayRecordChemical,
+    Variety,
+    Vineyard,
+)
+from database import SessionLocal
+from infrastructure import spreadsheet
+
+# Rows fetched per round trip from the server-side cursor
+YIELD_PER = 1000
+
+SPRAY_DIARY_HEADER = (
+    "Vineyard",
+    "Management Unit",
+    "Variety",
+    "Area (ha)",
+    "Spray Program",
+    "Spray",
+    "EL Stage",
+    "Complete",
+    "Date Completed",
+    "Start Time",
+    "Finish Time",
+    "Hours Taken",
+    "Operator",
+    "Temperature (C)",
+    "Relative Humidity (%)",
+    "Wind Speed",
+    "Wind Direction",
+    "Water Rate (L/ha)",
+    "Chemical",
+    "Active Ingredient",
+    "Chemical Groups",
+    "Target",
+    "Rate/100L",
+    "Rate Unit",
+    "Concentration Factor",
+    "Mix Rate/100L",
+    "Rate/Ha",
+    "Batch Number",
+    "Withholding Period",
+    "Note",
+)
+
+
+def spray_diary_statement(
+    vineyard_id: Optional[int] = None, spray_program_id: Optional[int] = None
+):
+    """
+    One row per chemical applied per spray record, or one row for a record
+    with no chemicals, in vineyard, unit and date order.
+    """
+    chemical_groups = (
+        select(func.string_agg(ChemicalGroup.code, ", "))
+        .join(ChemicalGroupLink, ChemicalGroupLink.group_id == ChemicalGroup.id)
+        .where(ChemicalGroupLink.chemical_id == Chemical.id)
+        .scalar_subquery()
+    )
+    mix_rate = func.round(
+        Chemical.rate_per_100l * SprayChemical.concentration_factor, 2
+    )
+
+    statement = (
+        select(
+            Vineyard.name,
+            ManagementUnit.name,
+            Variety.name,
+            ManagementUnit.area,
+            SprayProgram.name,
+            Spray.name,
+            GrowthStage.el_number,
+            SprayRecord.complete,
+            SprayRecord.date_completed,
+            SprayRecord.spray_start_time,
+            SprayRecord.spray_finish_time,
+            SprayRecord.hours_taken,
+            User.name,
+            SprayRecord.temperature,
+            SprayRecord.relative_humidity,
+            SprayRecord.wind_speed,
+            SprayRecord.wind_direction,
+            Spray.water_spray_rate_per_hectare,
+            Chemical.name,
+            Chemical.active_ingredient,
+            chemical_groups,
+            SprayChemical.target,
+            Chemical.rate_per_100l,
+            Chemical.rate_unit,
+            SprayChemical.concentration_factor,
+            mix_rate,
+            func.round(mix_rate * Spray.water_spray_rate_per_hectare / 100, 2),
+            SprayRecordChemical.batch_number,
+            Chemical.withholding_period,
+            SprayRecord.note,
+        )
+        .select_from(SprayRecord)
+        .join(ManagementUnit, ManagementUnit.id == SprayRecord.management_unit_id)
+        .join(Vineyard, Vineyard.id == ManagementUnit.vineyard_id)
+        .join(Spray, Spray.id == SprayRecord.spray_id)
+        .join(SprayProgram, SprayProgram.id == Spray.spray_program_id)
+        .outerjoin(Variety, Variety.id == ManagementUnit.variety_id)
+        .outerjoin(GrowthStage, GrowthStage.id == SprayRecord.growth_stage_id)
+        .outerjoin(User, User.id == SprayRecord.operator_id)
+        .outerjoin(
+            SprayRecordChemical, SprayRecordChemical.spray_record_id == SprayRecord.id
+        )
+        .outerjoin(Chemical, Chemical.id == SprayRecordChemical.chemical_id)
+        .outerjoin(
+            SprayChemical,
+            and_(
+                SprayChemical.spray_id == SprayRecord.spray_id,
+                SprayChemical.chemical_id == SprayRecordChemical.chemical_id,
+            ),
+        )
+        .order_by(
+            Vineyard.name,
+            ManagementUnit.sort_key,
+            SprayRecord.date_completed.nulls_last(),
+            SprayRecord.id,
+            Chemical.name,
+        )
+    )
+    if vineyard_id is not None:
+        statement = statement.where(Vineyard.id == vineyard_id)
+    if spray_program_id is not None:
+        statement = statement.where(Spray.spray_program_id == spray_program_id)
+    return statement
+
+
+def iter_spray_diary(
+    session: Session,
+    vineyard_id: Optional[int] = None,
+    spray_program_id: Optional[int] = None,
+) -> Iterator[tuple]:
+    """
+    Spray diary rows streamed from a server-side cursor, YIELD_PER at a time,
+    so only one batch is held in memory however large the export.
+    """
+    statement = spray_diary_statement(vineyard_id, spray_program_id)
+    result = session.exec(statement.execution_options(yield_per=YIELD_PER))
+    for row in result:
+        yield tuple(row)
+
+
+def spray_diary_download(
+    export_format: str,
+    title: str,
+    vineyard_id: Optional[int] = None,
+    spray_program_id: Optional[int] = None,
+) -> StreamingResponse:
+    """
+    The spray diary as a streamed CSV or XLSX attachment. The rows are read
+    on a session of its own, opened once streaming starts, because the
+    request's session is closed before the response body is sent.
+    """
+    if export_format not in ("csv", "xlsx"):
+        raise HTTPException(status_code=404, detail="Unknown export format")
+
+    def chunks():
+        with SessionLocal() as session:
+            rows = iter_spray_diary(session, vineyard_id, spray_program_id)
+            if export_format == "csv":
+                yield from spreadsheet.csv_chunks(SPRAY_DIARY_HEADER, rows)
+            else:
+                yield from spreadsheet.xlsx_chunks(title, SPRAY_DIARY_HEADER, rows)
+
+    filename = re.sub(r"[^a-z0-9]+", "-", title.lower()).strip("-")
+    return StreamingResponse(
+        chunks(),
+        media_type=(
+            spreadsheet.CSV_MEDIA_TYPE
+            if export_format == "csv"
+            else spreadsheet.XLSX_MEDIA_TYPE
+        ),
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}.{export_format}"'
+        },
+    )
@@ -1,22 +1,369 @@
 import datetime
+from array import array
+from typing import NamedTuple, Optional
 
 import fastapi_chameleon
 from fastapi import HTTPException, status
-from icecream import ic
+from sqlalchemy import Date, and_, cast, func, literal, or_, tuple_, update
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import selectinload
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from data.vineyard import (
     Chemical,
     ManagementUnit,
     Spray,
     SprayChemical,
+    SprayProgram,
     SprayRecord,
     SprayRecordChemical,
+    Status,
     Variety,
+    Vineyard,
+    WineColour,
 )
 
 
+class BulkApplyResult(NamedTuple):
+    created: int
+    skipped: int
+
+
+# Spray progress matrix cell codes
+UNASSIGNED = 0
+PENDING = 1
+COMPLETE = 2
+
+
+class ProgressUnit(NamedTuple):
+    id: int
+    vineyard_id: int
+    vineyard_name: str
+    name: str
+    variety: Optional[str]
+    wine_colour: Optional[str]
+    is_active: bool
+    # One code per spray column, and the completion date as a day ordinal
+    # (0 when not complete), so each cell costs a few bytes
+    codes: bytearray
+    completed_on: array
+
+    @property
+    def name_with_variety(self) -> str:
+        return f"{self.name} - {self.variety}" if self.variety else self.name
+
+    @property
+    def wine_bottle_tooltip(self) -> str:
+        if not self.is_active:
+            return f"Inactive - {self.variety or 'Unknown variety'}"
+        if self.wine_colour:
+            return f"{self.wine_colour} wine - {self.variety}"
+        return "Active management unit"
+
+    def cells(self):
+        """(code, dd/mm/yyyy or None) per spray column"""
+        for code, ordinal in zip(self.codes, self.completed_on):
+            date = (
+                datetime.date.fromordinal(ordinal).strftime("%d/%m/%Y")
+                if ordinal
+                else None
+            )
+            yield code, date
+
+
+class SprayProgress(NamedTuple):
+    units: list[ProgressUnit]
+    # spray_id -> (assigned, complete)
+    counts: dict[int, tuple[int, int]]
+
+
+def spray_progress_matrix(session: Session, spray_ids: list[int]) -> SprayProgress:
+    """
+    Unit x spray completion matrix for the given sprays, in column order, from
+    one query grouped by management unit. Per-spray assigned and complete
+    counts are tallied while the matrix is filled.
+    """
+    columns = {spray_id: index for index, spray_id in enumerate(spray_ids)}
+    counts = {spray_id: [0, 0] for spray_id in spray_ids}
+
+    in_sprays = SprayRecord.spray_id.in_(spray_ids) if spray_ids else literal(False)
+    recorded = SprayRecord.id.is_not(None)
+    statement = (
+        select(
+            ManagementUnit.id,
+            Vineyard.id,
+            Vineyard.name,
+            ManagementUnit.name,
+            Variety.name,
+            WineColour.name,
+            Status.status,
+            func.array_agg(
+                aggregate_order_by(SprayRecord.spray_id, SprayRecord.id)
+            ).filter(recorded),
+            func.array_agg(
+                aggregate_order_by(SprayRecord.complete, SprayRecord.id)
+            ).filter(recorded),
+            func.array_agg(
+                aggregate_order_by(
+                    cast(SprayRecord.date_completed, Date), SprayRecord.id
+                )
+            ).filter(recorded),
+        )
+        .join(Vineyard, Vineyard.id == ManagementUnit.vineyard_id)
+        .outerjoin(Variety, Variety.id == ManagementUnit.variety_id)
+        .outerjoin(WineColour, WineColour.id == Variety.wine_colour_id)
+        .outerjoin(Status, Status.id == ManagementUnit.status_id)
+        .outerjoin(
+            SprayRecord,
+            (SprayRecord.management_unit_id == ManagementUnit.id) & in_sprays,
+        )
+        .group_by(
+            ManagementUnit.id,
+            Vineyard.id,
+            Variety.name,
+            WineColour.name,
+            Status.status,
+        )
+        # Vineyard.id keeps same-named vineyards apart for the report's groupby
+        .order_by(Vineyard.name, Vineyard.id, ManagementUnit.sort_key)
+    )
+
+    units = []
+    for row in session.exec(statement):
+        mu_id, vineyard_id, vineyard_name, name, variety, colour, state = row[:7]
+        record_spray_ids, completes, dates = row[7:]
+
+        codes = bytearray(len(spray_ids))
+        completed_on = array("I", [0]) * len(spray_ids)
+        for spray_id, complete, date in zip(
+            record_spray_ids or (), completes or (), dates or ()
+        ):
+            column = columns[spray_id]
+            counts[spray_id][0] += 1
+            if complete:
+                counts[spray_id][1] += 1
+                codes[column] = COMPLETE
+                completed_on[column] = date.toordinal() if date else 0
+            else:
+                codes[column] = PENDING
+
+        units.append(
+            ProgressUnit(
+                id=mu_id,
+                vineyard_id=vineyard_id,
+                vineyard_name=vineyard_name,
+                name=name,
+                variety=variety,
+                wine_colour=colour,
+                is_active=state == "Active",
+                codes=codes,
+                completed_on=completed_on,
+            )
+        )
+
+    return SprayProgress(
+        units=units,
+        counts={spray_id: tuple(count) for spray_id, count in counts.items()},
+    )
+
+
+# Full spray history
+#
+# History pages are read newest first in keyset order on
+# (date_completed DESC NULLS LAST, date_created DESC NULLS LAST, id DESC), so
+# each "load more" request starts from the last record shown instead of an
+# OFFSET. Both dates are nullable, and a NULL is carried in the cursor as an
+# empty field.
+
+HISTORY_PAGE_SIZE = 50
+
+
+class HistoryCursor(NamedTuple):
+    date_completed: Optional[datetime.datetime]
+    date_created: Optional[datetime.datetime]
+    id: int
+
+    def encode(self) -> str:
+        completed = self.date_completed.isoformat() if self.date_completed else ""
+        created = self.date_created.isoformat() if self.date_created else ""
+        return f"{completed}~{created}~{self.id}"
+
+    @classmethod
+    def decode(cls, token: str) -> "HistoryCursor":
+        try:
+            completed, created, record_id = token.split("~")
+            return cls(
+                date_completed=(
+                    datetime.datetime.fromisoformat(completed) if completed else None
+                ),
+                date_created=(
+                    datetime.datetime.fromisoformat(created) if created else None
+                ),
+                id=int(record_id),
+            )
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+            )
+
+
+class SprayHistoryPage(NamedTuple):
+    records: list[SprayRecord]
+    next_cursor: Optional[HistoryCursor]
+
+
+class SprayHistoryStats(NamedTuple):
+    total: int
+    completed: int
+    pending: int
+
+    @property
+    def completion_percentage(self) -> int:
+        return int(self.completed / self.total * 100) if self.total else 0
+
+
+def _spray_history_scope(
+    statement,
+    vineyard_id: Optional[int],
+    management_unit_id: Optional[int],
+    spray_program_id: Optional[int],
+):
+    if vineyard_id is not None:
+        statement = statement.where(
+            SprayRecord.management_unit_id.in_(
+                select(ManagementUnit.id).where(
+                    ManagementUnit.vineyard_id == vineyard_id
+                )
+            )
+        )
+    if management_unit_id is not None:
+        statement = statement.where(
+            SprayRecord.management_unit_id == management_unit_id
+        )
+    if spray_program_id is not None:
+        statement = statement.where(
+            SprayRecord.spray_id.in_(
+                select(Spray.id).where(Spray.spray_program_id == spray_program_id)
+            )
+        )
+    return statement
+
+
+def _created_earlier(cursor: HistoryCursor):
+    """Records after the cursor among those with its date_completed"""
+    if cursor.date_created is None:
+        return and_(SprayRecord.date_created.is_(None), SprayRecord.id < cursor.id)
+    return or_(
+        tuple_(SprayRecord.date_created, SprayRecord.id)
+        < tuple_(cursor.date_created, cursor.id),
+        SprayRecord.date_created.is_(None),
+    )
+
+
+def _older_than(cursor: HistoryCursor):
+    """Records after the cursor in history order"""
+    created_earlier = _created_earlier(cursor)
+    if cursor.date_completed is None:
+        return and_(SprayRecord.date_completed.is_(None), created_earlier)
+    return or_(
+        SprayRecord.date_completed < cursor.date_completed,
+        and_(SprayRecord.date_completed == cursor.date_completed, created_earlier),
+        SprayRecord.date_completed.is_(None),
+    )
+
+
+def spray_history_page(
+    session: Session,
+    vineyard_id: Optional[int] = None,
+    management_unit_id: Optional[int] = None,
+    spray_program_id: Optional[int] = None,
+    after: Optional[HistoryCursor] = None,
+    limit: int = HISTORY_PAGE_SIZE,
+) -> SprayHistoryPage:
+    """
+    One page of spray records for a vineyard or management unit, newest first,
+    with everything the history cards display loaded up front.
+    """
+    statement = _spray_history_scope(
+        select(SprayRecord), vineyard_id, management_unit_id, spray_program_id
+    )
+    if after is not None:
+        statement = statement.where(_older_than(after))
+    statement = (
+        statement.order_by(
+            SprayRecord.date_completed.desc().nulls_last(),
+            SprayRecord.date_created.desc().nulls_last(),
+            SprayRecord.id.desc(),
+        )
+        # One extra row tells us whether there is another page
+        .limit(limit + 1)
+        .options(
+            selectinload(SprayRecord.spray_record_chemicals)
+            .selectinload(SprayRecordChemical.chemical)
+            .selectinload(Chemical.chemical_groups),
+            selectinload(SprayRecord.management_unit)
+            .selectinload(ManagementUnit.variety)
+            .selectinload(Variety.wine_colour),
+            selectinload(SprayRecord.growth_stage),
+            selectinload(SprayRecord.operator),
+            selectinload(SprayRecord.spray).selectinload(Spray.spray_program),
+            selectinload(SprayRecord.spray)
+            .selectinload(Spray.spray_chemicals)
+            .selectinload(SprayChemical.chemical),
+        )
+    )
+
+    records = list(session.exec(statement))
+    next_cursor = None
+    if len(records) > limit:
+        records = records[:limit]
+        last = records[-1]
+        next_cursor = HistoryCursor(last.date_completed, last.date_created, last.id)
+    return SprayHistoryPage(records=records, next_cursor=next_cursor)
+
+
+def spray_history_stats(
+    session: Session,
+    vineyard_id: Optional[int] = None,
+    management_unit_id: Optional[int] = None,
+    spray_program_id: Optional[int] = None,
+) -> SprayHistoryStats:
+    statement = _spray_history_scope(
+        select(
+            func.count(),
+            func.count().filter(SprayRecord.complete.is_(True)),
+            func.count().filter(SprayRecord.complete.is_(False)),
+        ).select_from(SprayRecord),
+        vineyard_id,
+        management_unit_id,
+        spray_program_id,
+    )
+    return SprayHistoryStats(*session.exec(statement).one())
+
+
+def spray_history_programs(
+    session: Session,
+    vineyard_id: Optional[int] = None,
+    management_unit_id: Optional[int] = None,
+) -> list[SprayProgram]:
+    """Programs with at least one record in the history, for the filter"""
+    recorded_sprays = _spray_history_scope(
+        select(SprayRecord.spray_id), vineyard_id, management_unit_id, None
+    )
+    statement = (
+        select(SprayProgram)
+        .where(
+            SprayProgram.id.in_(
+                select(Spray.spray_program_id).where(Spray.id.in_(recorded_sprays))
+            )
+        )
+        .order_by(SprayProgram.year_start.desc(), SprayProgram.date_created.desc())
+    )
+    return list(session.exec(statement))
+
+
 def delete_spray_record_by_id(session: Session, id: int):
     spray_record = eagerly_get_spray_record_by_id(id, session)
 
@@ -121,6 +468,121 @@ def create_or_update_spray_record(
     return spray_record
 
 
+def apply_spray_to_management_units(
+    session: Session,
+    spray_id: int,
+    active_only: bool = True,
+    wine_colour: Optional[str] = None,
+    vineyard_id: Optional[int] = None,
+    management_unit_ids: Optional[list[int]] = None,
+) -> BulkApplyResult:
+    """
+    Create an incomplete spray record for every management unit matching the
+    given predicate, as a single INSERT ... SELECT ... ON CONFLICT DO NOTHING.
+
+    Units that already have a record for this spray are skipped. Returns the
+    number of records created and the number of matching units skipped.
+    """
+    units = select(ManagementUnit.id)
+    if active_only:
+        units = units.join(ManagementUnit.status).where(Status.status == "Active")
+    if wine_colour:
+        units = (
+            units.join(ManagementUnit.variety)
+            .join(Variety.wine_colour)
+            .where(WineColour.name == wine_colour)
+        )
+    if vineyard_id is not None:
+        units = units.where(ManagementUnit.vineyard_id == vineyard_id)
+    if management_unit_ids is not None:
+        units = units.where(ManagementUnit.id.in_(management_unit_ids))
+
+    try:
+        matched = session.exec(select(func.count()).select_from(units.subquery())).one()
+
+        statement = (
+            insert(SprayRecord)
+            .from_select(
+                ["management_unit_id", "spray_id"],
+                units.add_columns(literal(spray_id)),
+            )
+            .on_conflict_do_nothing(constraint="uq_sprayrecord_management_unit_spray")
+        )
+        created = session.execute(statement).rowcount
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to apply spray to management units",
+        )
+
+    return BulkApplyResult(created=created, skipped=matched - created)
+
+
+def _complete_spray_records_statement(
+    spray_id,
+    management_unit_ids,
+    operator_id,
+    date_completed,
+    growth_stage_id,
+    # hours_taken,
+    spray_start_time,
+    spray_finish_time,
+    temperature,
+    relative_humidity,
+    wind_speed,
+    wind_direction,
+):
+    if spray_start_time:
+        spray_start_time = datetime.datetime.combine(date_completed, spray_start_time)
+
+    if spray_finish_time:
+        spray_finish_time = datetime.datetime.combine(date_completed, spray_finish_time)
+
+    return (
+        update(SprayRecord)
+        .where(
+            SprayRecord.management_unit_id.in_(
+                [int(mu_id) for mu_id in management_unit_ids]
+            ),
+            SprayRecord.spray_id == spray_id,
+        )
+        .values(
+            operator_id=operator_id,
+            date_completed=date_completed,
+            growth_stage_id=growth_stage_id,
+            # hours_taken=hours_taken,
+            spray_start_time=spray_start_time,
+            spray_finish_time=spray_finish_time,
+            temperature=temperature,
+            relative_humidity=relative_humidity,
+            wind_speed=wind_speed,
+            wind_direction=wind_direction,
+            complete=True,
+        )
+        .returning(SprayRecord.id)
+    )
+
+
+def _spray_record_chemicals_upsert(spray_record_ids, chem_batch_map):
+    chemicals = insert(SprayRecordChemical).values(
+        [
+            {
+                "spray_record_id": spray_record_id,
+                "chemical_id": chem_id,
+                "batch_number": batch_number,
+            }
+            for spray_record_id in spray_record_ids
+            for chem_id, batch_number in chem_batch_map.items()
+        ]
+    )
+    return chemicals.on_conflict_do_update(
+        constraint="uq_sprayrecord_chemical",
+        set_={"batch_number": chemicals.excluded.batch_number},
+    )
+
+
 def update_multiple_spray_records(
     session,
     spray_id,
@@ -137,66 +599,87 @@ def update_multiple_spray_records(
     wind_direction,
     chem_batch_map,
 ):
-    for mu_id in management_unit_ids:
-        spray_record = session.exec(
-            select(SprayRecord).where(
-                SprayRecord.management_unit_id == int(mu_id),
-                SprayRecord.spray_id == spray_id,
-            )
-        ).first()
-        if not spray_record:
-            continue
+    """
+    Mark the spray records for these management units as complete.
+
+    Runs as one UPDATE over every selected unit's record for this spray and one
+    multi-row upsert of their batch numbers on uq_sprayrecord_chemical, rather
+    than a SELECT per unit and per chemical. Units without a record are ignored.
+    """
+    if not management_unit_ids:
+        return
+
+    statement = _complete_spray_records_statement(
+        spray_id,
+        management_unit_ids,
+        operator_id,
+        date_completed,
+        growth_stage_id,
+        spray_start_time,
+        spray_finish_time,
+        temperature,
+        relative_humidity,
+        wind_speed,
+        wind_direction,
+    )
 
-        ic("###### Record Exists #####")
-        ic(spray_record)
+    try:
+        spray_record_ids = session.execute(statement).scalars().all()
 
-        if spray_start_time:
-            spray_record.spray_start_time = datetime.datetime.combine(
-                date_completed, spray_start_time
+        if spray_record_ids and chem_batch_map:
+            session.execute(
+                _spray_record_chemicals_upsert(spray_record_ids, chem_batch_map)
             )
-        else:
-            spray_record.spray_start_time = spray_start_time
 
-        ic("###### UPDATE #######")
-        ic(spray_record.spray_start_time)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+
+
+async def update_multiple_spray_records_async(
+    session: AsyncSession,
+    spray_id,
+    management_unit_ids,
+    operator_id,
+    date_completed,
+    growth_stage_id,
+    # hours_taken,
+    spray_start_time,
+    spray_finish_time,
+    temperature,
+    relative_humidity,
+    wind_speed,
+    wind_direction,
+    chem_batch_map,
+):
+    """Async version of update_multiple_spray_records"""
+    if not management_unit_ids:
+        return
+
+    statement = _complete_spray_records_statement(
+        spray_id,
+        management_unit_ids,
+        operator_id,
+        date_completed,
+        growth_stage_id,
+        spray_start_time,
+        spray_finish_time,
+        temperature,
+        relative_humidity,
+        wind_speed,
+        wind_direction,
+    )
 
-        if spray_finish_time:
-            spray_record.spray_finish_time = datetime.datetime.combine(
-                date_completed, spray_finish_time
+    try:
+        spray_record_ids = (await session.execute(statement)).scalars().all()
+
+        if spray_record_ids and chem_batch_map:
+            await session.execute(
+                _spray_record_chemicals_upsert(spray_record_ids, chem_batch_map)
             )
-        else:
-            spray_record.spray_finish_time = spray_finish_time
-
-        ic("###### UPDATE #######")
-        ic(spray_record.spray_start_time)
-
-        spray_record.operator_id = operator_id
-        spray_record.date_completed = date_completed
-        spray_record.growth_stage_id = growth_stage_id
-        # spray_record.hours_taken = hours_taken
-        spray_record.temperature = temperature
-        spray_record.relative_humidity = relative_humidity
-        spray_record.wind_speed = wind_speed
-        spray_record.wind_direction = wind_direction
-        spray_record.complete = True
-
-        for chem_id, batch_number in chem_batch_map.items():
-            existing = session.exec(
-                select(SprayRecordChemical).where(
-                    SprayRecordChemical.spray_record_id == spray_record.id,
-                    SprayRecordChemical.chemical_id == chem_id,
-                )
-            ).first()
-            if existing:
-                existing.batch_number = batch_number
-                src = existing
-            else:
-                src = SprayRecordChemical(
-                    spray_record_id=spray_record.id,
-                    chemical_id=chem_id,
-                    batch_number=batch_number,
-                )
-            session.add(src)
 
-        session.add(spray_record)
-    session.commit()
+        await session.commit()
+    except Exception:
+        await session.rollback()
+        raise
@@ -5,6 +5,7 @@ import fastapi_chameleon
 from fastapi import HTTPException
 from sqlalchemy.orm import selectinload
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from starlette import status
 
 from data.vineyard import (
@@ -31,8 +32,8 @@ def eagerly_get_all_sprays(session: Session) -> list[Spray]:
     return sprays
 
 
-def eagerly_get_spray_by_id(id: int, session: Session) -> Spray:
-    statement = (
+def _spray_by_id_statement(id: int):
+    return (
         select(Spray)
         .where(Spray.id == id)
         .options(
@@ -40,7 +41,17 @@ def eagerly_get_spray_by_id(id: int, session: Session) -> Spray:
         )
     )
 
-    spray = session.exec(statement).first()
+
+def eagerly_get_spray_by_id(id: int, session: Session) -> Spray:
+    spray = session.exec(_spray_by_id_statement(id)).first()
+    if not spray:
+        fastapi_chameleon.not_found()
+    return spray
+
+
+async def eagerly_get_spray_by_id_async(id: int, session: AsyncSession) -> Spray:
+    """Async version of eagerly_get_spray_by_id"""
+    spray = (await session.exec(_spray_by_id_statement(id))).first()
     if not spray:
         fastapi_chameleon.not_found()
     return spray
@@ -0,0 +1,176 @@
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session as OrmSession
+from sqlalchemy.orm import object_session
+from sqlmodel import Session
+
+from data.vineyard import SprayRecord
+from infrastructure import invalidation_bus, vineyard_invalidation
+
+# Management units are too small to be useful below this zoom
+MIN_MANAGEMENT_UNIT_ZOOM = 12
+# Tiles at or above this zoom are drawn unsimplified
+MAX_SIMPLIFY_ZOOM = 18
+TILE_EXTENT = 4096
+WEB_MERCATOR_WIDTH = 40075016.68557849
+MAX_CACHED_TILES = 2000
+
+TILE_SQL = text(
+    """
+    WITH bounds AS (
+        SELECT ST_TileEnvelope(:z, :x, :y) AS geom
+    ),
+    vineyard_tiles AS (
+        SELECT
+            v.id,
+            v.name,
+            ST_AsMVTGeom(
+                ST_SimplifyPreserveTopology(ST_Transform(v.boundary, 3857), :tolerance),
+                bounds.geom,
+                :extent
+            ) AS geom
+        FROM vineyards v, bounds
+        WHERE v.boundary && ST_Transform(bounds.geom, 4326)
+    ),
+    unit_tiles AS (
+        SELECT
+            mu.id,
+            mu.name,
+            mu.vineyard_id,
+            varieties.name AS variety,
+            wine_colours.name AS colour,
+            states.status,
+            CASE
+                WHEN CAST(:spray_id AS integer) IS NULL THEN NULL
+                WHEN sr.id IS NULL THEN 'unassigned'
+                WHEN sr.complete THEN 'complete'
+                ELSE 'pending'
+            END AS spray_state,
+            ST_AsMVTGeom(
+                ST_SimplifyPreserveTopology(
+                    ST_Transform(mu.area_polygon, 3857), :tolerance
+                ),
+                bounds.geom,
+                :extent
+            ) AS geom
+        FROM management_units mu
+        CROSS JOIN bounds
+        LEFT JOIN varieties ON varieties.id = mu.variety_id
+        LEFT JOIN wine_colours ON wine_colours.id = varieties.wine_colour_id
+        LEFT JOIN states ON states.id = mu.status_id
+        LEFT JOIN spray_records sr
+            ON sr.management_unit_id = mu.id AND sr.spray_id = :spray_id
+        WHERE :z >= :min_unit_zoom
+          AND mu.area_polygon && ST_Transform(bounds.geom, 4326)
+    )
+    SELECT
+        COALESCE(
+            (SELECT ST_AsMVT(vineyard_tiles, 'vineyards', :extent, 'geom')
+             FROM vineyard_tiles),
+            ''::bytea
+        )
+        || COALESCE(
+            (SELECT ST_AsMVT(unit_tiles, 'management_units', :extent, 'geom')
+             FROM unit_tiles),
+            ''::bytea
+        )
+    """
+)
+
+
+def simplify_tolerance(z: int) -> float:
+    """One tile pixel in web mercator metres, so simplification is invisible"""
+    if z >= MAX_SIMPLIFY_ZOOM:
+        return 0.0
+    return WEB_MERCATOR_WIDTH / (2**z) / TILE_EXTENT
+
+
+_tiles: "OrderedDict[tuple, bytes]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def get_tile(
+    session: Session, z: int, x: int, y: int, spray_id: Optional[int] = None
+) -> bytes:
+    """
+    A Mapbox vector tile with a `vineyards` and a `management_units` layer.
+    With a spray selected, units carry its spray_state: complete, pending or
+    unassigned. Rendered tiles are kept in a bounded LRU cache.
+    """
+    key = (z, x, y, spray_id)
+    with _lock:
+        tile = _tiles.get(key)
+        if tile is not None:
+            _tiles.move_to_end(key)
+            return tile
+
+    tile = session.execute(
+        TILE_SQL,
+        {
+            "z": z,
+            "x": x,
+            "y": y,
+            "spray_id": spray_id,
+            "tolerance": simplify_tolerance(z),
+            "extent": TILE_EXTENT,
+            "min_unit_zoom": MIN_MANAGEMENT_UNIT_ZOOM,
+        },
+    ).scalar_one()
+    tile = bytes(tile)
+
+    with _lock:
+        _tiles[key] = tile
+        while len(_tiles) > MAX_CACHED_TILES:
+            _tiles.popitem(last=False)
+    return tile
+
+
+def invalidate_tiles(spray_only: bool = False):
+    """Drop cached tiles - only those showing spray state if spray_only"""
+    with _lock:
+        if not spray_only:
+            _tiles.clear()
+            return
+        for key in [key for key in _tiles if key[3] is not None]:
+            del _tiles[key]
+
+
+# Invalidation
+#
+# Geometry and unit changes (see vineyard_invalidation) drop every tile. Spray
+# record changes, including the bulk INSERT/UPDATE statements in
+# spray_record_service which bypass mapper events, drop only the tiles showing
+# spray state. Both go through the invalidation bus so every worker's tiles are
+# dropped.
+
+
+def _spray_record_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        invalidation_bus.mark(session, "spray_records", target.id)
+
+
+for _event in ("after_insert", "after_update", "after_delete"):
+    event.listen(SprayRecord, _event, _spray_record_changed)
+
+
+@event.listens_for(OrmSession, "do_orm_execute")
+def _bulk_spray_record_statement(orm_execute_state):
+    if not (
+        orm_execute_state.is_insert
+        or orm_execute_state.is_update
+        or orm_execute_state.is_delete
+    ):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ is SprayRecord:
+        invalidation_bus.mark(orm_execute_state.session, "spray_records")
+
+
+vineyard_invalidation.subscribe(lambda vineyard_id: invalidate_tiles())
+invalidation_bus.subscribe(
+    "spray_records", lambda key: invalidate_tiles(spray_only=True)
+)
@@ -1,12 +1,13 @@
 import datetime
 from typing import Optional
 
-from passlib.handlers.sha2_crypt import sha512_crypt as crypto
 from sqlalchemy import func
 from sqlalchemy.future import select
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from data.user import User, UserRole
+from infrastructure import invalidation_bus, password_hashing
 
 
 def user_count(session: Session) -> int:
@@ -22,6 +23,30 @@ def create_user(
     password: Optional[str],
     role: UserRole = UserRole.USER,
 ) -> User:
+    """Hashes on the calling thread - for scripts and bootstrap"""
+    _require_user_fields(name, email, password)
+    return _add_user(
+        session, name, email, role, password_hashing.hash_password_blocking(password)
+    )
+
+
+async def create_user_async(
+    session: Session,
+    name: Optional[str],
+    email: Optional[str],
+    password: Optional[str],
+    role: UserRole = UserRole.USER,
+) -> User:
+    """create_user with the password hashed off the event loop"""
+    _require_user_fields(name, email, password)
+    return _add_user(
+        session, name, email, role, await password_hashing.hash_password(password)
+    )
+
+
+def _require_user_fields(
+    name: Optional[str], email: Optional[str], password: Optional[str]
+):
     if not password:
         raise Exception("password is required")
     if not email:
@@ -29,18 +54,23 @@ def create_user(
     if not name:
         raise Exception("name is required")
 
+
+def _add_user(
+    session: Session, name: str, email: str, role: UserRole, password_hash: str
+) -> User:
     user = User()
     user.email = email
     user.name = name
     user.role = role
-    user.hash_password = crypto.hash(password, rounds=172_434)
+    user.hash_password = password_hash
 
     session.add(user)
+    invalidation_bus.mark(session, "users")
     session.commit()
     return user
 
 
-def update_user(
+async def update_user(
     session: Session,
     user_id: int,
     name: str,
@@ -57,9 +87,10 @@ def update_user(
     user.role = UserRole(role)
 
     if password:  # Only update password if provided
-        user.hash_password = crypto.hash(password, rounds=172_434)
+        user.hash_password = await password_hashing.hash_password(password)
 
     session.add(user)
+    invalidation_bus.mark(session, "users", user.id)
     session.commit()
     session.refresh(user)
     return user
@@ -86,6 +117,7 @@ def delete_user(session: Session, user_id: int) -> bool:
         # you might need to delete or update related records first
 
         session.delete(user)
+        invalidation_bus.mark(session, "users", user_id)
         session.commit()
         return True
 
@@ -95,7 +127,7 @@ def delete_user(session: Session, user_id: int) -> bool:
         return False
 
 
-def login_user(session: Session, email: str, password: str) -> Optional[User]:
+async def login_user(session: Session, email: str, password: str) -> Optional[User]:
     query = select(User).filter(User.email == email)
     results = session.exec(query)
 
@@ -103,12 +135,16 @@ def login_user(session: Session, email: str, password: str) -> Optional[User]:
     if not user:
         return user
 
-    try:
-        if not crypto.verify(password, user.hash_password):
-            return None
-    except ValueError:
+    if not await password_hashing.verify_password(password, user.hash_password):
         return None
 
+    # Upgrade hashes made with old parameters while we have the password
+    if password_hashing.needs_rehash(user.hash_password):
+        try:
+            user.hash_password = await password_hashing.hash_password(password)
+        except password_hashing.HashingBusy:
+            pass  # Next login will try again
+
     # update last_login
     user.last_login = datetime.datetime.now()
     session.add(user)
@@ -129,6 +165,10 @@ def get_user_by_id(session, user_id: int) -> Optional[User]:
     return session.get(User, user_id)
 
 
+async def get_user_by_id_async(session: AsyncSession, user_id: int) -> Optional[User]:
+    return await session.get(User, user_id)
+
+
 def get_user_by_email(session: Session, email: str) -> Optional[User]:
     query = select(User).filter(User.email == email)
     result = session.exec(query)
@@ -157,6 +197,7 @@ def update_user_role(
 
     user.role = new_role
     session.add(user)
+    invalidation_bus.mark(session, "users", user.id)
     session.commit()
     return user
 
@@ -1,11 +1,13 @@
-import re
-from typing import List
+import datetime
+from decimal import Decimal
+from typing import List, NamedTuple, Optional
 
 from fastapi import HTTPException, status
 from icecream import ic
 from sqlalchemy import asc, func
 from sqlalchemy.orm import joinedload, selectinload
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from data.vineyard import (
     Chemical,
@@ -15,28 +17,65 @@ from data.vineyard import (
     SprayChemical,
     SprayRecord,
     SprayRecordChemical,
+    Status,
     Variety,
     Vineyard,
     WineColour,
 )
 
 
-def custom_sort_key_management_unit(management_unit: ManagementUnit):
-    if management_unit.name.isdigit():
-        return int(management_unit.name)
-    elif re.search(r"\d+", management_unit.name) == None:
-        return 999
-    else:
-        return int(re.search(r"\d+", management_unit.name).group())
+class SprayCompletion(NamedTuple):
+    all_complete: bool
+    assigned: int
+    completed: int
+    last_completed: Optional[datetime.datetime]
 
 
-def sort_mus(vineyard: Vineyard) -> Vineyard:
-    vineyard.management_units.sort(
-        key=lambda management_unit: custom_sort_key_management_unit(
-            management_unit=management_unit
+class VineyardSummary(NamedTuple):
+    id: int
+    name: str
+    total_management_units_count: int
+    active_management_units_count: int
+    red_management_units_count: int
+    white_management_units_count: int
+    hectares: Decimal
+
+    @property
+    def has_active_management_units(self) -> bool:
+        return self.active_management_units_count > 0
+
+    @property
+    def has_red_wine_units(self) -> bool:
+        return self.red_management_units_count > 0
+
+    @property
+    def has_white_wine_units(self) -> bool:
+        return self.white_management_units_count > 0
+
+
+def vineyard_summaries(session: Session) -> List[VineyardSummary]:
+    """
+    Per-vineyard management unit counts and hectares from one grouped query,
+    rather than walking Vineyard.management_units and their lazy relationships.
+    """
+    statement = (
+        select(
+            Vineyard.id,
+            Vineyard.name,
+            func.count(ManagementUnit.id),
+            func.count(ManagementUnit.id).filter(Status.status == "Active"),
+            func.count(ManagementUnit.id).filter(WineColour.name == "Red"),
+            func.count(ManagementUnit.id).filter(WineColour.name == "White"),
+            func.coalesce(func.sum(ManagementUnit.area), 0),
         )
+        .outerjoin(ManagementUnit, ManagementUnit.vineyard_id == Vineyard.id)
+        .outerjoin(Status, Status.id == ManagementUnit.status_id)
+        .outerjoin(Variety, Variety.id == ManagementUnit.variety_id)
+        .outerjoin(WineColour, WineColour.id == Variety.wine_colour_id)
+        .group_by(Vineyard.id)
+        .order_by(Vineyard.name)
     )
-    return vineyard
+    return [VineyardSummary(*row) for row in session.exec(statement)]
 
 
 def all_vineyards(session: Session) -> List[Vineyard]:
@@ -44,9 +83,6 @@ def all_vineyards(session: Session) -> List[Vineyard]:
 
     vineyards = session.exec(query).all()
 
-    for vineyard in vineyards:
-        sort_mus(vineyard=vineyard)
-
     return vineyards
 
 
@@ -62,8 +98,6 @@ def all_vineyards_with_mangement_units(session: Session):
     )
 
     vineyards = session.exec(statement).all()
-    for vineyard in vineyards:
-        sort_mus(vineyard=vineyard)
     return vineyards
 
 
@@ -72,7 +106,6 @@ def get_vineyard_by_id(session: Session, id: int):
     vineyard = session.get(Vineyard, id)
     if not vineyard:
         raise HTTPException(status_code=404, detail="Vineyard not found")
-    sort_mus(vineyard=vineyard)
     return vineyard
 
 
@@ -88,7 +121,7 @@ def eagerly_get_vineyard_managment_units_by_id(session: Session, vineyard_id: in
     management_units = session.exec(
         select(ManagementUnit)
         .where(ManagementUnit.vineyard_id == vineyard_id)
-        .order_by(ManagementUnit.name)
+        .order_by(ManagementUnit.sort_key)
         .options(
             selectinload(ManagementUnit.variety),
             selectinload(ManagementUnit.status),
@@ -98,7 +131,7 @@ def eagerly_get_vineyard_managment_units_by_id(session: Session, vineyard_id: in
 
 
 def get_all_management_units(session: Session):
-    query = select(ManagementUnit).order_by(ManagementUnit.name)
+    query = select(ManagementUnit).order_by(ManagementUnit.sort_key)
 
     management_units = session.exec(query)
     if not management_units:
@@ -252,16 +285,19 @@ def eagerly_get_vineyard_spray_spray_records(
             .selectinload(SprayChemical.chemical)
             .selectinload(Chemical.chemical_groups),
         )
-        .order_by(asc(ManagementUnit.name))
+        .order_by(asc(ManagementUnit.sort_key))
     )
     spray_records = session.exec(statement).all()
-    spray_records.sort(key=lambda sr: sr.management_unit.name or "")
     ic(spray_records)
     return spray_records
 
 
-# TODO Reduce eagerness!
 def eagerly_get_vineyard_sprays(session: Session, vineyard_id: int) -> list[Spray]:
+    """
+    Sprays applied to at least one management unit in this vineyard.
+    Spray records are deliberately not loaded here as Spray.spray_records spans
+    every vineyard - use eagerly_get_vineyard_spray_records_by_spray for those.
+    """
     statement = (
         select(Spray)
         .distinct(Spray.id)
@@ -274,10 +310,6 @@ def eagerly_get_vineyard_sprays(session: Session, vineyard_id: int) -> list[Spra
             selectinload(Spray.spray_chemicals)
             .selectinload(SprayChemical.chemical)
             .selectinload(Chemical.chemical_groups),
-            selectinload(Spray.spray_records)
-            .selectinload(SprayRecord.management_unit)
-            .selectinload(ManagementUnit.variety)
-            .selectinload(Variety.wine_colour),
         )
         .order_by(Spray.id, GrowthStage.el_number)
     )
@@ -287,14 +319,80 @@ def eagerly_get_vineyard_sprays(session: Session, vineyard_id: int) -> list[Spra
     return sprays
 
 
-def get_spray_chemicals(spray_id: int, session: Session) -> list[Chemical]:
-    statement = (
+def _vineyard_spray_records_by_spray_statement(vineyard_id: int, spray_ids: list[int]):
+    return (
+        select(SprayRecord)
+        .join(SprayRecord.management_unit)
+        .where(ManagementUnit.vineyard_id == vineyard_id)
+        .where(SprayRecord.spray_id.in_(spray_ids))
+        .options(
+            selectinload(SprayRecord.management_unit)
+            .selectinload(ManagementUnit.variety)
+            .selectinload(Variety.wine_colour),
+            selectinload(SprayRecord.management_unit).selectinload(
+                ManagementUnit.status
+            ),
+        )
+        .order_by(asc(ManagementUnit.sort_key), SprayRecord.id)
+    )
+
+
+def _group_spray_records_by_spray(
+    spray_ids: list[int], spray_records
+) -> dict[int, list[SprayRecord]]:
+    records_by_spray: dict[int, list[SprayRecord]] = {
+        spray_id: [] for spray_id in spray_ids
+    }
+    for spray_record in spray_records:
+        records_by_spray[spray_record.spray_id].append(spray_record)
+    return records_by_spray
+
+
+def eagerly_get_vineyard_spray_records_by_spray(
+    session: Session, vineyard_id: int, spray_ids: list[int]
+) -> dict[int, list[SprayRecord]]:
+    """
+    Spray records for the given sprays, restricted to this vineyard's management units.
+    Returns a mapping of spray_id -> records in management unit sort order.
+    """
+    if not spray_ids:
+        return _group_spray_records_by_spray(spray_ids, [])
+
+    statement = _vineyard_spray_records_by_spray_statement(vineyard_id, spray_ids)
+    return _group_spray_records_by_spray(spray_ids, session.exec(statement).all())
+
+
+async def eagerly_get_vineyard_spray_records_by_spray_async(
+    session: AsyncSession, vineyard_id: int, spray_ids: list[int]
+) -> dict[int, list[SprayRecord]]:
+    """Async version of eagerly_get_vineyard_spray_records_by_spray"""
+    if not spray_ids:
+        return _group_spray_records_by_spray(spray_ids, [])
+
+    statement = _vineyard_spray_records_by_spray_statement(vineyard_id, spray_ids)
+    result = await session.exec(statement)
+    return _group_spray_records_by_spray(spray_ids, result.all())
+
+
+def _spray_chemicals_statement(spray_id: int):
+    return (
         select(Chemical).join(SprayChemical).filter(SprayChemical.spray_id == spray_id)
     )
-    spray_chemicals = session.exec(statement).all()
+
+
+def get_spray_chemicals(spray_id: int, session: Session) -> list[Chemical]:
+    spray_chemicals = session.exec(_spray_chemicals_statement(spray_id)).all()
     return spray_chemicals
 
 
+async def get_spray_chemicals_async(
+    spray_id: int, session: AsyncSession
+) -> list[Chemical]:
+    """Async version of get_spray_chemicals"""
+    result = await session.exec(_spray_chemicals_statement(spray_id))
+    return list(result.all())
+
+
 def get_spray_record_chemicals(
     spray_record_id: int, session: Session
 ) -> list[Chemical]:
@@ -307,30 +405,51 @@ def get_spray_record_chemicals(
     return spray_record_chemicals
 
 
-def spray_complete_for_vineyard(
-    session: Session, spray_id: int, vineyard_id: int
-) -> bool:
-    """
-    Check if a spray program is complete for all management units that have spray records for this program.
-    Returns True if all spray records for this program in this vineyard are marked as complete.
-    Returns False if there are no spray records for this program, or if any are incomplete.
-    """
-    from sqlmodel import select
-
-    # Get all spray records for this spray program in this vineyard
+def _spray_completion_statement(vineyard_id: int, spray_ids: Optional[list[int]]):
+    completed_count = func.count(SprayRecord.id).filter(SprayRecord.complete.is_(True))
     statement = (
-        select(SprayRecord)
-        .join(ManagementUnit)
-        .where(
-            SprayRecord.spray_id == spray_id,
-            ManagementUnit.vineyard_id == vineyard_id,
+        select(
+            SprayRecord.spray_id,
+            func.count(SprayRecord.id),
+            completed_count,
+            func.max(SprayRecord.date_completed),
         )
+        .join(ManagementUnit)
+        .where(ManagementUnit.vineyard_id == vineyard_id)
+        .group_by(SprayRecord.spray_id)
     )
-    spray_records = session.exec(statement).all()
+    if spray_ids is not None:
+        statement = statement.where(SprayRecord.spray_id.in_(spray_ids))
+    return statement
+
+
+def _spray_completion_from_rows(rows) -> dict[int, SprayCompletion]:
+    completion: dict[int, SprayCompletion] = {}
+    for spray_id, assigned, completed, last_completed in rows:
+        completion[spray_id] = SprayCompletion(
+            all_complete=assigned > 0 and completed == assigned,
+            assigned=assigned,
+            completed=completed,
+            last_completed=last_completed,
+        )
+    return completion
+
+
+def spray_completion_for_vineyard(
+    session: Session, vineyard_id: int, spray_ids: Optional[list[int]] = None
+) -> dict[int, SprayCompletion]:
+    """
+    Completion summary for every spray applied in this vineyard, from one grouped query.
+    Returns a mapping of spray_id -> (all_complete, assigned, completed, last_completed).
+    A spray with no spray records in the vineyard is absent from the mapping.
+    """
+    statement = _spray_completion_statement(vineyard_id, spray_ids)
+    return _spray_completion_from_rows(session.exec(statement))
 
-    # If no spray records exist for this program, consider it incomplete
-    if not spray_records:
-        return False
 
-    # Check if all spray records are complete
-    return all(record.complete for record in spray_records)
+async def spray_completion_for_vineyard_async(
+    session: AsyncSession, vineyard_id: int, spray_ids: Optional[list[int]] = None
+) -> dict[int, SprayCompletion]:
+    """Async version of spray_completion_for_vineyard"""
+    statement = _spray_completion_statement(vineyard_id, spray_ids)
+    return _spray_completion_from_rows(await session.exec(statement))
@@ -0,0 +1,61 @@
+import os
+import sys
+from pathlib import Path
+
+# The app modules import from the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Settings needs these to build the (lazily connecting) engine URLs
+for name, value in {
+    "APP_NAME": "vine-tests",
+    "DATABASE_TYPE": "postgresql",
+    "DATABASE_USER": "vine",
+    "DATABASE_PASSWORD": "vine",
+    "DATABASE_HOST": "localhost",
+    "DATABASE_PORT": "5432",
+    "DATABASE_NAME": "vine",
+}.items():
+    os.environ.setdefault(name, value)
+
+import pytest  # noqa: E402
+import sqlalchemy as sa  # noqa: E402
+from geoalchemy2 import Geometry  # noqa: E402
+from sqlalchemy.ext.compiler import compiles  # noqa: E402
+from sqlalchemy.schema import CreateColumn, CreateTable  # noqa: E402
+from sqlmodel import Session, SQLModel  # noqa: E402
+
+
+# Just enough to create the Postgres schema on SQLite: geometry columns are
+# stored as-is and the generated sort_key becomes a plain column
+@compiles(Geometry, "sqlite")
+def _geometry_as_blob(type_, compiler, **kw):
+    return "BLOB"
+
+
+@compiles(CreateColumn, "sqlite")
+def _without_generated(element, compiler, **kw):
+    column = element.element
+    if column.computed is None:
+        return compiler.visit_create_column(element, **kw)
+    return f"{column.name} {compiler.type_compiler.process(column.type)}"
+
+
+@pytest.fixture
+def schema_session():
+    """A session on an in-memory SQLite database with every model's table"""
+    import data.vineyard  # noqa: F401 - maps every model's relationships
+
+    engine = sa.create_engine("sqlite://")
+
+    @sa.event.listens_for(engine, "connect")
+    def _postgres_functions(dbapi_connection, connection_record):
+        for name in ("AsEWKB", "GeomFromEWKT"):
+            dbapi_connection.create_function(name, 1, lambda value: value)
+        # Sent by the invalidation bus on commit once its listeners are registered
+        dbapi_connection.create_function("pg_notify", 2, lambda channel, payload: None)
+
+    with engine.begin() as connection:
+        for table in SQLModel.metadata.sorted_tables:
+            connection.execute(CreateTable(table))
+    with Session(engine) as session:
+        yield session
@@ -0,0 +1,27 @@
+import pytest
+from starlette.requests import Request
+
+from infrastructure.conditional_get import etag_matches
+
+ETAG = '"abc123"'
+
+
+def request_with(if_none_match=None) -> Request:
+    headers = []
+    if if_none_match is not None:
+        headers.append((b"if-none-match", if_none_match.encode()))
+    return Request({"type": "http", "method": "GET", "headers": headers})
+
+
+@pytest.mark.parametrize(
+    "if_none_match",
+    ['"abc123"', 'W/"abc123"', '"other", "abc123"', 'W/"other",W/"abc123"', "*"],
+)
+def test_matches(if_none_match):
+    assert etag_matches(request_with(if_none_match), ETAG)
+    assert etag_matches(request_with(if_none_match), f"W/{ETAG}")
+
+
+@pytest.mark.parametrize("if_none_match", [None, "", '"other"', '"abc"', "abc123"])
+def test_does_not_match(if_none_match):
+    assert not etag_matches(request_with(if_none_match), ETAG)
@@ -0,0 +1,83 @@
+import pytest
+
+from data.vineyard import (
+    Chemical,
+    ManagementUnit,
+    MixRateUnit,
+    Spray,
+    SprayChemical,
+    SprayProgram,
+    SprayRecord,
+    Target,
+    Vineyard,
+)
+from services import chemical_service
+from services.data_version_service import vineyard_version
+
+
+@pytest.fixture
+def spray(schema_session):
+    program = SprayProgram(name="2026", year_start=2026, year_end=2026)
+    spray = Spray(
+        name="EL 4",
+        water_spray_rate_per_hectare=500,
+        spray_program=program,
+        spray_chemicals=[
+            SprayChemical(
+                chemical=Chemical(name=name, active_ingredient=name),
+                concentration_factor=1,
+            )
+            for name in ("Sulphur", "Mancozeb")
+        ],
+    )
+    schema_session.add(
+        SprayRecord(
+            spray=spray,
+            management_unit=ManagementUnit(
+                name="1", vineyard=Vineyard(name="Home"), sort_key="00001"
+            ),
+        )
+    )
+    # Not on any spray in the vineyard
+    schema_session.add(Chemical(name="Copper", active_ingredient="Copper"))
+    schema_session.commit()
+    return spray
+
+
+def test_reinserted_spray_chemicals_change_the_version(schema_session, spray):
+    before = vineyard_version(schema_session, 1)
+
+    # As SprayUpdateViewModel does, leaving sprays.date_updated alone. It's the
+    # first row that is replaced as SQLite, unlike Postgres, reuses the highest
+    # id once it is deleted.
+    old = spray.spray_chemicals[0]
+    schema_session.delete(old)
+    schema_session.flush()
+    schema_session.add(
+        SprayChemical(
+            spray_id=spray.id,
+            chemical_id=old.chemical_id,
+            concentration_factor=2,
+            target=Target.DOWNY_MILDEW,
+        )
+    )
+    schema_session.commit()
+
+    assert vineyard_version(schema_session, 1) != before
+
+
+def test_chemical_edits_change_the_version_of_pages_using_it(schema_session, spray):
+    before = vineyard_version(schema_session, 1)
+    copper = chemical_service.get_chemical_by_name(schema_session, "Copper")
+    chemical_service.update_chemical(
+        schema_session, copper.id, "Copper", "Copper", 30, MixRateUnit.GRAMS.value
+    )
+
+    assert vineyard_version(schema_session, 1) == before
+
+    sulphur = chemical_service.get_chemical_by_name(schema_session, "Sulphur")
+    chemical_service.update_chemical(
+        schema_session, sulphur.id, "Sulphur", "Sulphur", 200, MixRateUnit.GRAMS.value
+    )
+
+    assert vineyard_version(schema_session, 1) != before
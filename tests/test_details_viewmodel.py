@@ -0,0 +1,116 @@
+import pytest
+from starlette.requests import Request
+
+import data.vineyard  # noqa: F401 - maps every model's relationships
+from data.vineyard import (
+    Chemical,
+    GrowthStage,
+    ManagementUnit,
+    Spray,
+    SprayChemical,
+    SprayProgram,
+    SprayRecord,
+    Status,
+    Variety,
+    Vineyard,
+    WineColour,
+)
+from infrastructure.query_counter import count_queries
+from viewmodels.vineyards.details_viewmodel import DetailsViewModel
+
+# One statement per service call plus its selectin loads, however many
+# management units, sprays and records there are
+STATEMENT_BUDGET = 15
+# Varieties and states are selectin loaded for the units and again for the
+# records' units; any shape running more often than that is a lazy load
+REPEAT_THRESHOLD = 2
+
+
+def management_units(session, vineyard, variety, status, count):
+    units = [
+        ManagementUnit(
+            name=f"{vineyard.name} {number}",
+            sort_key=f"{number:05d}",
+            vineyard=vineyard,
+            variety=variety,
+            status=status,
+        )
+        for number in range(1, count + 1)
+    ]
+    session.add_all(units)
+    return units
+
+
+@pytest.fixture
+def vineyards(schema_session):
+    variety = Variety(name="Shiraz", wine_colour=WineColour(name="Red"))
+    status = Status(status="Active")
+    program = SprayProgram(name="2026", year_start=2026, year_end=2026)
+    sulphur = Chemical(name="Sulphur", active_ingredient="Sulphur")
+
+    home, other = Vineyard(name="Home"), Vineyard(name="Other")
+    home_units = management_units(schema_session, home, variety, status, 4)
+    other_units = management_units(schema_session, other, variety, status, 3)
+
+    for el_number in (4, 12, 23):
+        spray = Spray(
+            name=f"EL {el_number}",
+            water_spray_rate_per_hectare=500,
+            growth_stage=GrowthStage(el_number=el_number, description=""),
+            spray_program=program,
+            spray_chemicals=[SprayChemical(chemical=sulphur, concentration_factor=1)],
+        )
+        schema_session.add_all(
+            SprayRecord(spray=spray, management_unit=unit)
+            for unit in home_units + other_units
+        )
+    # Sprayed in the other vineyard only
+    schema_session.add(
+        SprayRecord(
+            spray=Spray(
+                name="Other only",
+                water_spray_rate_per_hectare=500,
+                spray_program=program,
+            ),
+            management_unit=other_units[0],
+        )
+    )
+    schema_session.commit()
+    ids = home.id, other.id
+    # Start each test from an empty identity map, as a request would
+    schema_session.expunge_all()
+    return ids
+
+
+def request():
+    return Request({"type": "http", "method": "GET", "headers": [], "state": {}})
+
+
+def test_statement_count_is_bounded(schema_session, vineyards):
+    home_id, _ = vineyards
+
+    with count_queries(threshold=REPEAT_THRESHOLD, strict=True) as stats:
+        vm = DetailsViewModel(home_id, request(), schema_session)
+        vm.to_dict()
+
+    assert stats.count <= STATEMENT_BUDGET
+    assert len(vm.sprays) == 3
+
+
+def test_only_own_management_unit_records_are_loaded(schema_session, vineyards):
+    home_id, _ = vineyards
+
+    vm = DetailsViewModel(home_id, request(), schema_session)
+
+    assert {spray.name for spray in vm.sprays} == {"EL 4", "EL 12", "EL 23"}
+    for spray in vm.sprays:
+        records = vm.spray_records_by_spray[spray.id]
+        assert len(records) == 4
+        assert {record.management_unit.vineyard_id for record in records} == {home_id}
+    # Nothing from the other vineyard made it into the session
+    loaded_units = [
+        unit
+        for unit in schema_session.identity_map.values()
+        if isinstance(unit, ManagementUnit)
+    ]
+    assert {unit.vineyard_id for unit in loaded_units} == {home_id}
@@ -0,0 +1,37 @@
+import pytest
+
+from services import map_service
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    map_service._cache.clear()
+    yield
+    map_service._cache.clear()
+
+
+def build_with(monkeypatch, during_build=lambda: None):
+    def build(session, vineyard_id):
+        during_build()
+        return {"type": "FeatureCollection", "features": []}
+
+    monkeypatch.setattr(map_service, "_build_feature_collection", build)
+
+
+def test_map_is_cached(monkeypatch):
+    build_with(monkeypatch)
+
+    built = map_service.vineyard_map(None, 1)
+
+    assert map_service._cache[1] is built
+    assert map_service.vineyard_map(None, 1) is built
+
+
+@pytest.mark.parametrize("vineyard_id", [1, None])
+def test_map_invalidated_while_building_is_not_cached(monkeypatch, vineyard_id):
+    # The write committed after the map's rows were read
+    build_with(monkeypatch, lambda: map_service._vineyard_invalidated(vineyard_id))
+
+    map_service.vineyard_map(None, 1)
+
+    assert 1 not in map_service._cache
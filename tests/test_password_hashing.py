@@ -0,0 +1,42 @@
+import asyncio
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from infrastructure import password_hashing
+
+
+@pytest.fixture(autouse=True)
+def fresh_pool():
+    yield
+    if password_hashing._executor is not None:
+        password_hashing._executor.shutdown()
+        password_hashing._executor = None
+
+
+# Run in the pool's processes
+
+
+def _die_first_time(marker: str) -> str:
+    if not os.path.exists(marker):
+        open(marker, "w").close()
+        os._exit(1)
+    return "done"
+
+
+def test_job_is_retried_in_a_new_pool_when_a_process_dies(tmp_path):
+    broken = password_hashing._get_executor()
+
+    result = asyncio.run(password_hashing._run(_die_first_time, str(tmp_path / "died")))
+
+    assert result == "done"
+    assert password_hashing._executor is not broken
+
+
+def test_second_failure_is_raised_and_the_pool_still_recovers():
+    with pytest.raises(BrokenProcessPool):
+        asyncio.run(password_hashing._run(os._exit, 1))
+
+    password_hash = password_hashing.hash_password_blocking("secret")
+    assert asyncio.run(password_hashing.verify_password("secret", password_hash))
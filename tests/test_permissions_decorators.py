@@ -0,0 +1,50 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import Depends, FastAPI, Request
+from fastapi.testclient import TestClient
+
+import data.vineyard  # noqa: F401 - maps User's relationships
+from auth.permissions_decorators import require_operator
+from data.user import User, UserRole
+
+
+def operator() -> User:
+    return User(
+        id=1, name="Operator", email="operator@example.com", role=UserRole.OPERATOR
+    )
+
+
+def test_sync_routes_are_not_serialized():
+    """Parallel requests to a slow sync route behind require_* run concurrently"""
+    # Each request waits here for the other; if the wrapped route ran on the
+    # event loop the second could never arrive and the barrier would time out
+    barrier = threading.Barrier(2, timeout=5)
+    app = FastAPI()
+
+    @app.get("/slow")
+    @require_operator()
+    def slow(request: Request, current_user: User = Depends(operator)):
+        barrier.wait()
+        return {}
+
+    # One client, so both requests share one event loop
+    with TestClient(app) as client, ThreadPoolExecutor(max_workers=2) as pool:
+        responses = list(pool.map(lambda _: client.get("/slow"), range(2)))
+
+    assert [response.status_code for response in responses] == [200, 200]
+
+
+def test_sync_routes_redirect_without_a_user():
+    app = FastAPI()
+
+    @app.get("/slow")
+    @require_operator()
+    def slow(request: Request):
+        return {}
+
+    with TestClient(app) as client:
+        response = client.get("/slow", follow_redirects=False)
+
+    assert response.status_code == 302
+    assert response.headers["location"] == "/account/login"
@@ -0,0 +1,97 @@
+import logging
+
+import pytest
+import sqlalchemy as sa
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from infrastructure import query_counter
+from infrastructure.query_counter import NPlusOneError, count_queries
+
+
+@pytest.fixture
+def engine():
+    # One shared connection, so the app's worker threads see the same database
+    engine = sa.create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=sa.pool.StaticPool,
+    )
+    with engine.begin() as connection:
+        connection.exec_driver_sql("CREATE TABLE sprays (id INTEGER PRIMARY KEY)")
+        connection.exec_driver_sql("INSERT INTO sprays (id) VALUES (1), (2), (3)")
+    return engine
+
+
+def select_spray(connection, spray_id):
+    return connection.execute(
+        sa.text("SELECT id FROM sprays WHERE id = :id"), {"id": spray_id}
+    ).scalar()
+
+
+def app_for(engine, strict=False):
+    app = FastAPI()
+    query_counter.install(app, threshold=2, strict=strict)
+
+    @app.get("/sprays/{count}")
+    def sprays(count: int):
+        with engine.connect() as connection:
+            return [select_spray(connection, spray_id) for spray_id in range(count)]
+
+    return app
+
+
+def test_shape_collapses_parameters_and_in_lists():
+    assert query_counter.statement_shape(
+        "SELECT *\n  FROM sprays WHERE id IN (?, ?, ?) AND name = %(name)s"
+    ) == query_counter.statement_shape(
+        "SELECT * FROM sprays WHERE id IN (?, ?) AND name = $1"
+    )
+
+
+def test_strict_mode_raises_on_repeated_shape(engine):
+    with engine.connect() as connection, count_queries(threshold=2, strict=True):
+        select_spray(connection, 1)
+        select_spray(connection, 2)
+        with pytest.raises(NPlusOneError):
+            select_spray(connection, 3)
+
+
+def test_lenient_mode_counts_repeated_shape(engine):
+    with engine.connect() as connection, count_queries(threshold=2) as stats:
+        for spray_id in (1, 2, 3):
+            select_spray(connection, spray_id)
+        connection.exec_driver_sql("SELECT count(*) FROM sprays")
+
+    assert stats.count == 4
+    assert [count for _, count in stats.repeated()] == [3]
+
+
+def test_statements_outside_a_request_are_not_counted(engine):
+    with count_queries(threshold=2) as stats:
+        pass
+    with engine.connect() as connection:
+        select_spray(connection, 1)
+
+    assert stats.count == 0
+
+
+def test_response_carries_server_timing(engine):
+    response = TestClient(app_for(engine)).get("/sprays/2")
+
+    assert response.status_code == 200
+    assert response.headers["server-timing"].startswith("db;dur=")
+    assert response.headers["server-timing"].endswith('desc="2 queries"')
+
+
+def test_repeated_shape_is_logged_per_request(engine, caplog):
+    with caplog.at_level(logging.WARNING, logger=query_counter.__name__):
+        response = TestClient(app_for(engine)).get("/sprays/3")
+
+    assert response.headers["server-timing"].endswith('desc="3 queries"')
+    assert "Possible N+1 on GET /sprays/3: statement ran 3 times" in caplog.text
+
+
+def test_strict_app_fails_the_request(engine):
+    with pytest.raises(NPlusOneError):
+        TestClient(app_for(engine, strict=True)).get("/sprays/3")
@@ -0,0 +1,71 @@
+import datetime
+import itertools
+
+import pytest
+import sqlalchemy as sa
+from sqlmodel import Session, select
+
+import data.vineyard  # noqa: F401 - maps every model's relationships
+from data.vineyard import SprayRecord
+from services.spray_record_service import HistoryCursor, _older_than
+
+DATES = [None, datetime.datetime(2026, 1, 1), datetime.datetime(2026, 1, 2)]
+KEY = (SprayRecord.date_completed, SprayRecord.date_created, SprayRecord.id)
+HISTORY_ORDER = (
+    SprayRecord.date_completed.desc().nulls_last(),
+    SprayRecord.date_created.desc().nulls_last(),
+    SprayRecord.id.desc(),
+)
+
+
+@pytest.fixture
+def session():
+    # Just the key columns; the full table needs PostGIS
+    engine = sa.create_engine("sqlite://")
+    table = sa.table(
+        "spray_records",
+        sa.column("id"),
+        sa.column("date_completed", sa.DateTime),
+        sa.column("date_created", sa.DateTime),
+    )
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            "CREATE TABLE spray_records "
+            "(id INTEGER PRIMARY KEY, date_completed TIMESTAMP, date_created TIMESTAMP)"
+        )
+        # Two records for every combination, NULLs included
+        combinations = itertools.product(DATES, DATES, range(2))
+        connection.execute(
+            sa.insert(table),
+            [
+                {"id": record_id, "date_completed": completed, "date_created": created}
+                for record_id, (completed, created, _) in enumerate(combinations, 1)
+            ],
+        )
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.mark.parametrize("page_size", [1, 2, 5])
+def test_pages_cover_history_in_order(session, page_size):
+    history = [
+        tuple(row) for row in session.exec(select(*KEY).order_by(*HISTORY_ORDER))
+    ]
+
+    paged, cursor = [], None
+    while True:
+        statement = select(*KEY).order_by(*HISTORY_ORDER).limit(page_size + 1)
+        if cursor is not None:
+            statement = statement.where(_older_than(cursor))
+        rows = [tuple(row) for row in session.exec(statement)]
+        paged += rows[:page_size]
+        if len(rows) <= page_size:
+            break
+        cursor = HistoryCursor.decode(HistoryCursor(*rows[page_size - 1]).encode())
+
+    assert paged == history
+
+
+def test_cursor_round_trips_null_dates():
+    cursor = HistoryCursor(date_completed=None, date_created=None, id=5)
+    assert HistoryCursor.decode(cursor.encode()) == cursor
@@ -0,0 +1,34 @@
+from sqlalchemy.orm import make_transient_to_detached
+from sqlmodel import Session
+
+import data.vineyard  # noqa: F401 - maps every model's relationships
+from data.vineyard import ManagementUnit
+from infrastructure import vineyard_invalidation
+
+
+def loaded_unit(session: Session, vineyard_id: int) -> ManagementUnit:
+    """A management unit as if loaded from the database, without one"""
+    management_unit = ManagementUnit(id=1, name="Block 1", vineyard_id=vineyard_id)
+    make_transient_to_detached(management_unit)
+    session.add(management_unit)
+    return management_unit
+
+
+def test_moved_unit_marks_both_vineyards():
+    session = Session()
+    management_unit = loaded_unit(session, vineyard_id=1)
+    management_unit.vineyard_id = 2
+
+    vineyard_invalidation._management_unit_changed(None, None, management_unit)
+
+    assert session.info["cache_invalidations"] == {("vineyards", 1), ("vineyards", 2)}
+
+
+def test_unit_update_marks_its_vineyard():
+    session = Session()
+    management_unit = loaded_unit(session, vineyard_id=1)
+    management_unit.name = "Block 1a"
+
+    vineyard_invalidation._management_unit_changed(None, None, management_unit)
+
+    assert session.info["cache_invalidations"] == {("vineyards", 1)}
@@ -1,3 +1,5 @@
+import os
+from itertools import groupby
 from typing import List, Optional
 
 from sqlalchemy import func
@@ -11,10 +13,10 @@ from data.vineyard import (
     ChemicalGroup,
     Spray,
     SprayProgram,
-    SprayRecord,
-    Vineyard,
 )
-from services import vineyard_service
+from database import async_engine, engine
+from infrastructure import fragment_cache, loop_monitor, pool_stats
+from services import spray_record_service
 from services.user_service import get_users_by_role
 from viewmodels.shared.viewmodel import ViewModelBase
 
@@ -49,9 +51,6 @@ class SprayProgressReportViewModel(ViewModelBase):
         # Ensure user has admin permissions
         self.require_permission(UserRole.ADMIN)
 
-        # Get all vineyards
-        self.vineyards: List[Vineyard] = vineyard_service.all_vineyards(session)
-
         # Get all spray programs for dropdown (ordered by most recent first)
         self.all_spray_programs = session.exec(
             select(SprayProgram).order_by(
@@ -83,42 +82,26 @@ class SprayProgressReportViewModel(ViewModelBase):
                 .where(Spray.spray_program_id == selected_program.id)
                 .order_by(Spray.name)
             ).all()
-
-            # Build lookup: {(management_unit_id, spray_id): SprayRecord}
-            # Only include spray records for this program's sprays
-            spray_ids = [spray.id for spray in self.sprays]
-
-            if spray_ids:
-                self.spray_records = session.exec(
-                    select(SprayRecord).where(SprayRecord.spray_id.in_(spray_ids))
-                ).all()
-            else:
-                self.spray_records = []
         else:
             # No spray programs exist
             self.sprays = []
-            self.spray_records = []
 
-        from collections import defaultdict
-
-        # Dict keyed by spray_id -> {"complete": X, "assigned": Y}
-        self.spray_completion_stats = defaultdict(
-            lambda: {"complete": 0, "assigned": 0}
+        # Unit x spray status codes, one row per management unit
+        progress = spray_record_service.spray_progress_matrix(
+            session, [spray.id for spray in self.sprays]
         )
-
-        for record in self.spray_records:
-            if record is None or record.spray_id is None:
-                continue
-
-            self.spray_completion_stats[record.spray_id]["assigned"] += 1
-
-            if record.complete:
-                self.spray_completion_stats[record.spray_id]["complete"] += 1
+        self.management_unit_count = len(progress.units)
+        self.units_by_vineyard = [
+            (vineyard_name, list(units))
+            for (_, vineyard_name), units in groupby(
+                progress.units, key=lambda unit: (unit.vineyard_id, unit.vineyard_name)
+            )
+        ]
+        self.complete_code = spray_record_service.COMPLETE
+        self.pending_code = spray_record_service.PENDING
 
         self.spray_completion_stats_display = {}
-        for spray_id, stats in self.spray_completion_stats.items():
-            complete = stats["complete"]
-            assigned = stats["assigned"]
+        for spray_id, (assigned, complete) in progress.counts.items():
             display = f"{complete} / {assigned}"
             percent = int((complete / assigned) * 100) if assigned else 0
 
@@ -129,9 +112,10 @@ class SprayProgressReportViewModel(ViewModelBase):
                 "assigned": assigned,
             }
 
-        self.spray_lookup = {
-            (rec.management_unit_id, rec.spray_id): rec for rec in self.spray_records
-        }
+        self.completed_count = sum(complete for _, complete in progress.counts.values())
+        self.pending_count = sum(
+            assigned - complete for assigned, complete in progress.counts.values()
+        )
 
 
 class UserManagementViewModel(ViewModelBase):
@@ -230,6 +214,31 @@ class ChemicalManagementViewModel(ViewModelBase):
         return sorted(chemicals, key=lambda x: x.name.lower())
 
 
+class LoopBlocksViewModel(ViewModelBase):
+    def __init__(self, request: Request, session: Session):
+        super().__init__(request, session)
+
+        # Stack traces are only for superadmins
+        self.require_permission(UserRole.SUPERADMIN)
+
+        self.monitor_enabled = loop_monitor.is_enabled()
+        self.loop_blocks: List[loop_monitor.LoopBlock] = loop_monitor.recent_blocks()
+
+
+class DatabasePoolViewModel(ViewModelBase):
+    def __init__(self, request: Request, session: Session):
+        super().__init__(request, session)
+
+        self.require_permission(UserRole.SUPERADMIN)
+
+        self.pid = os.getpid()
+        self.pools: List[pool_stats.PoolStatus] = [
+            pool_stats.pool_status(engine),
+            pool_stats.pool_status(async_engine),
+        ]
+        self.fragments: fragment_cache.FragmentCacheStats = fragment_cache.stats()
+
+
 class SystemAdminViewModel(ViewModelBase):
     def __init__(self, request: Request, session: Session):
         super().__init__(request, session)
@@ -1,36 +1,34 @@
 from typing import Optional
 
 from sqlalchemy.orm import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from starlette.requests import Request
 
 from data.user import User, UserRole
 from infrastructure import cookie_auth
-from services.user_service import get_user_by_id
 
 
 class ViewModelBase:
     def __init__(self, request: Request, session: Session):
+        self._init_base(request, session)
+
+        # Get the logged in user, shared with the permission decorators and
+        # dependencies for this request. None if the cookie is missing, invalid
+        # or belongs to a deleted user.
+        self._set_user(cookie_auth.get_user_via_auth_cookie(self.request, self.session))
+
+    def _init_base(self, request: Request, session):
         self.request: Request = request
-        self.session: Session = session
+        self.session = session
         self.error: Optional[str] = None
         self.info: Optional[str] = None
         self.success: Optional[str] = None
         self.warning: Optional[str] = None
 
-        # Get user ID from cookie
-        self.user_id: Optional[int] = cookie_auth.get_user_id_via_auth_cookie(
-            self.request
-        )
-        self.is_logged_in = self.user_id is not None
-
-        # Get full user object if logged in
-        self.user: Optional[User] = None
-        if self.user_id:
-            self.user = get_user_by_id(self.session, self.user_id)
-            # Double-check in case user was deleted but cookie still exists
-            if not self.user:
-                self.is_logged_in = False
-                self.user_id = None
+    def _set_user(self, user: Optional[User]):
+        self.user: Optional[User] = user
+        self.user_id: Optional[int] = self.user.id if self.user else None
+        self.is_logged_in = self.user is not None
 
     # Message helper methods
 
@@ -101,3 +99,20 @@ class ViewModelBase:
             result[prop] = getattr(self, prop)
 
         return result
+
+
+class AsyncViewModelBase(ViewModelBase):
+    """
+    ViewModelBase for async routes on an AsyncSession. The logged in user and
+    anything else from the database is loaded in load(), which must be awaited
+    before to_dict().
+    """
+
+    def __init__(self, request: Request, session: AsyncSession):
+        self._init_base(request, session)
+        self._set_user(None)
+
+    async def load(self):
+        self._set_user(
+            await cookie_auth.get_user_via_auth_cookie_async(self.request, self.session)
+        )
@@ -1,10 +1,10 @@
 from typing import Optional
 
-from sqlmodel import Session, select
+from sqlmodel import Session
 from starlette.requests import Request
 
-from data.vineyard import Chemical, SprayProgram, Target
-from services import spray_program_service, spray_service, vineyard_service
+from data.vineyard import SprayProgram
+from services import reference_data_service, spray_program_service, spray_service
 from viewmodels.shared.viewmodel import ViewModelBase
 
 
@@ -20,12 +20,13 @@ class SprayEditFormViewModel(ViewModelBase):
 
         self.id: int = None
         self.name: str = "Spray Program"
-        self.growth_stages: list = vineyard_service.all_growth_stages(session)
+        reference_data = reference_data_service.reference_data(session)
+        self.growth_stages = reference_data.growth_stages
         self.spray_program: SprayProgram = (
             spray_program_service.get_spray_program_by_id(
                 session=session, spray_program_id=spray_program_id
             )
         )
         self.spray = spray_service.eagerly_get_spray_by_id(session=session, id=spray_id)
-        self.chemicals = session.exec(select(Chemical)).all()
-        self.targets = [target.value for target in Target]
+        self.chemicals = reference_data.chemicals
+        self.targets = reference_data.targets
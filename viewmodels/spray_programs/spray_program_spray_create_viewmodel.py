@@ -4,7 +4,7 @@ from sqlmodel import Session, select
 from starlette.requests import Request
 
 from data.vineyard import Chemical, Spray, SprayProgram
-from services import spray_program_service, spray_service, vineyard_service
+from services import reference_data_service, spray_program_service, spray_service
 from viewmodels.shared.viewmodel import ViewModelBase
 
 
@@ -32,7 +32,9 @@ class CreateSprayProgramSprayViewModel(ViewModelBase):
         self.chemicals_targets = zip(
             self.chemical_ids, self.targets, self.concentration_factors
         )
-        self.growth_stages: list = vineyard_service.all_growth_stages(self.session)
+        self.growth_stages = reference_data_service.reference_data(
+            self.session
+        ).growth_stages
         self.spray_program_id: int = form.get("spray_program_id")
         self.spray_program: SprayProgram = (
             spray_program_service.get_spray_program_by_id(
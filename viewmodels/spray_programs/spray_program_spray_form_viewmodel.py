@@ -4,7 +4,7 @@ from sqlmodel import Session
 from starlette.requests import Request
 
 from data.vineyard import SprayProgram
-from services import spray_program_service, vineyard_service
+from services import reference_data_service, spray_program_service
 from viewmodels.shared.viewmodel import ViewModelBase
 
 
@@ -19,7 +19,9 @@ class SprayFormViewModel(ViewModelBase):
 
         self.id: int = None
         self.name: str = "Spray Program"
-        self.growth_stages: list = vineyard_service.all_growth_stages(session)
+        self.growth_stages = reference_data_service.reference_data(
+            session
+        ).growth_stages
         self.spray_program: SprayProgram = (
             spray_program_service.get_spray_program_by_id(
                 session=session, spray_program_id=spray_program_id
@@ -11,7 +11,7 @@ from data.vineyard import (
     SprayProgram,
     Target,
 )
-from services import vineyard_service
+from services import reference_data_service
 from viewmodels.shared.viewmodel import ViewModelBase
 
 
@@ -40,10 +40,10 @@ class SprayUpdateViewModel(ViewModelBase):
             self.set_error("Spray program not found")
             return
 
-        self.growth_stages: list = vineyard_service.all_growth_stages(session)
-        statement = select(Chemical).order_by(Chemical.name)
-        self.chemicals = session.exec(statement).all()
-        self.targets = [target.value for target in Target]
+        reference_data = reference_data_service.reference_data(session)
+        self.growth_stages = reference_data.growth_stages
+        self.chemicals = reference_data.chemicals
+        self.targets = reference_data.targets
 
     def update_spray(
         self,
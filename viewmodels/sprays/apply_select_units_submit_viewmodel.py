@@ -31,31 +31,20 @@ class ApplySelectUnitsSubmitViewModel(ViewModelBase):
             return
 
     def process_submission(self):
-        added_units = "<ul>"
-
-        for mu_id in self.management_unit_ids:
-            mu = vineyard_service.eagerly_get_management_unit_by_id(
-                session=self.session, id=mu_id
-            )
-            if mu.is_active:
-                spray_record = spray_record_service.create_or_update_spray_record(
-                    self.session, mu.id, self.spray_id
-                )
-                self.session.add(spray_record)
-                print(
-                    f"################## Added {mu.vineyard.name} {mu.name_with_variety} ###################"
-                )
-                added_units += f"<li> {mu.vineyard.name} - {mu.name_with_variety} </li>"
-            else:
-                print(f"################## Skipped {mu.name} ###################")
-
-        self.session.commit()
-
-        spray = spray_service.eagerly_get_spray_by_id(
-            id=self.spray_id, session=self.session
+        result = spray_record_service.apply_spray_to_management_units(
+            self.session, self.spray_id, management_unit_ids=self.management_unit_ids
         )
 
+        # Inactive units are never assigned, so leave them out of the summary
+        selected_ids = set(self.management_unit_ids)
+        added_units = "<ul>"
+        for vineyard in self.vineyards:
+            for mu in vineyard.management_units:
+                if mu.id in selected_ids and mu.is_active:
+                    added_units += f"<li> {vineyard.name} - {mu.name_with_variety} </li>"
+
         self.success = (
-            f"Successfully added {spray.name} to selected management units: <br/>"
+            f"Successfully added {self.spray.name} to selected management units "
+            f"({result.created} added, {result.skipped} already assigned): <br/>"
         )
         self.success += f"{added_units} </ul>"
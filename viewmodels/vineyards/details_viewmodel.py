@@ -35,39 +35,33 @@ class DetailsViewModel(ViewModelBase):
             self.session, self.id
         )
 
-        self.spray_records: list[SprayRecord] = (
-            vineyard_service.eagerly_get_vineyard_spray_records(self.session, self.id)
+        # Only this vineyard's records for each spray, keyed by spray_id
+        self.spray_records_by_spray: dict[int, list[SprayRecord]] = (
+            vineyard_service.eagerly_get_vineyard_spray_records_by_spray(
+                self.session, self.id, [spray.id for spray in self.sprays]
+            )
+        )
+
+        # Completion status and most recent completion date per spray,
+        # from a single grouped query rather than one query per spray
+        completion = vineyard_service.spray_completion_for_vineyard(
+            self.session, self.id, [spray.id for spray in self.sprays]
         )
 
-        # Add spray program completion status as a dictionary
         # This creates a mapping of spray_id -> completion_status
         self.spray_completion_status: dict[int, bool] = {}
 
-        # Add spray program completion dates as a dictionary
         # This creates a mapping of spray_id -> formatted_completion_date
         self.spray_completion_dates: dict[int, str] = {}
 
         for spray in self.sprays:
-            self.spray_completion_status[spray.id] = (
-                vineyard_service.spray_complete_for_vineyard(
-                    self.session, spray.id, self.id
-                )
+            spray_completion = completion.get(spray.id)
+            self.spray_completion_status[spray.id] = bool(
+                spray_completion and spray_completion.all_complete
             )
-
-            # Get most recent completion date for this spray program
-            completed_records = [
-                record
-                for record in self.spray_records
-                if (record.spray_id == spray.id and record.date_completed is not None)
-            ]
-
-            if completed_records:
-                # Find the most recent completion date
-                most_recent_record = max(
-                    completed_records, key=lambda x: x.date_completed
-                )
+            if spray_completion and spray_completion.last_completed:
                 self.spray_completion_dates[spray.id] = (
-                    most_recent_record.date_completed.strftime("%d/%m/%Y")
+                    spray_completion.last_completed.strftime("%d/%m/%Y")
                 )
             else:
                 self.spray_completion_dates[spray.id] = None
@@ -2,7 +2,7 @@ from sqlmodel import Session
 from starlette.requests import Request
 
 from data.vineyard import ManagementUnit
-from services import vineyard_service
+from services import reference_data_service, vineyard_service
 from viewmodels.shared.viewmodel import ViewModelBase
 
 
@@ -14,4 +14,4 @@ class EditMUViewModel(ViewModelBase):
         self.mu: ManagementUnit = vineyard_service.eagerly_get_management_unit_by_id(
             self.session, management_unit_id
         )
-        self.varieties = vineyard_service.all_varieties(session)
+        self.varieties = reference_data_service.reference_data(session).varieties
@@ -1,7 +1,8 @@
+from typing import List
+
 from sqlmodel import Session
 from starlette.requests import Request
 
-from data.vineyard import Vineyard
 from services import vineyard_service
 from viewmodels.shared.viewmodel import ViewModelBase
 
@@ -10,4 +11,7 @@ class ListViewModel(ViewModelBase):
     def __init__(self, request: Request, session: Session):
         super().__init__(request, session)
 
-        self.vineyards: List[Vineyard] = vineyard_service.all_vineyards(session)
+        self.vineyards: List[vineyard_service.VineyardSummary] = (
+            vineyard_service.vineyard_summaries(session)
+        )
+        self.total_hectares = sum(v.hectares for v in self.vineyards)
@@ -1,21 +1,27 @@
 from collections import defaultdict
 from typing import Dict, List, Optional
+from urllib.parse import urlencode
 
 from sqlalchemy.orm import Session
-from sqlmodel import select
 from starlette.requests import Request
 
 from data.user import UserRole
 from data.vineyard import ManagementUnit, Spray, SprayProgram, SprayRecord
+from services import spray_record_service
+from services.spray_record_service import HistoryCursor
 from viewmodels.shared.viewmodel import ViewModelBase
 
 
-class MUFullSprayHistoryViewModel(ViewModelBase):
+class MUFullSprayHistoryRecordsViewModel(ViewModelBase):
+    """One page of a management unit's spray history, as served to "load more" """
+
     def __init__(
         self,
         management_unit_id: int,
         request: Request,
         session: Session,
+        spray_program_id: Optional[int] = None,
+        after: Optional[str] = None,
     ):
         super().__init__(request, session)
 
@@ -29,56 +35,67 @@ class MUFullSprayHistoryViewModel(ViewModelBase):
         if not self.management_unit:
             raise ValueError(f"Management Unit with ID {management_unit_id} not found")
 
-        # Get all spray records for this management unit, ordered by most recent first
-        self.spray_records: List[SprayRecord] = session.exec(
-            select(SprayRecord)
-            .where(SprayRecord.management_unit_id == management_unit_id)
-            .order_by(
-                SprayRecord.date_completed.desc().nulls_last(),
-                SprayRecord.date_created.desc(),
-            )
-        ).all()
-
-        # Get associated sprays and programs for the records
-        spray_ids = [record.spray_id for record in self.spray_records]
-        if spray_ids:
-            self.sprays: List[Spray] = session.exec(
-                select(Spray).where(Spray.id.in_(spray_ids))
-            ).all()
-
-            program_ids = list(set(spray.spray_program_id for spray in self.sprays))
-            self.spray_programs: List[SprayProgram] = session.exec(
-                select(SprayProgram)
-                .where(SprayProgram.id.in_(program_ids))
-                .order_by(
-                    SprayProgram.year_start.desc(), SprayProgram.date_created.desc()
-                )
-            ).all()
-        else:
-            self.sprays = []
-            self.spray_programs = []
-
-        # Create lookup dictionaries for efficient access
-        self.spray_lookup = {spray.id: spray for spray in self.sprays}
-        self.program_lookup = {program.id: program for program in self.spray_programs}
-
-        # Group records by program (maintaining chronological order within each program)
+        self.spray_program_id = spray_program_id
+
+        page = spray_record_service.spray_history_page(
+            session,
+            management_unit_id=management_unit_id,
+            spray_program_id=spray_program_id,
+            after=HistoryCursor.decode(after) if after else None,
+        )
+        self.spray_records: List[SprayRecord] = page.records
+
+        # Create lookup dictionaries from the eagerly loaded relationships
+        self.spray_lookup: Dict[int, Spray] = {
+            record.spray_id: record.spray for record in self.spray_records
+        }
+        self.program_lookup: Dict[int, SprayProgram] = {
+            spray.spray_program_id: spray.spray_program
+            for spray in self.spray_lookup.values()
+        }
+
+        # Group this page's records by program (maintaining chronological order)
         self.records_by_program: Dict[int, List[SprayRecord]] = defaultdict(list)
         for record in self.spray_records:
             spray = self.spray_lookup.get(record.spray_id)
             if spray:
                 self.records_by_program[spray.spray_program_id].append(record)
 
-        # Calculate statistics
-        self.total_records = len(self.spray_records)
-        self.completed_records = len([r for r in self.spray_records if r.complete])
-        self.pending_records = len(
-            [r for r in self.spray_records if r.complete is False]
+        self.next_page_url: Optional[str] = None
+        if page.next_cursor:
+            params = {"after": page.next_cursor.encode()}
+            if spray_program_id is not None:
+                params["spray_program_id"] = spray_program_id
+            self.next_page_url = (
+                f"/management_unit/{management_unit_id}/full_spray_history/records?"
+                f"{urlencode(params)}"
+            )
+
+
+class MUFullSprayHistoryViewModel(MUFullSprayHistoryRecordsViewModel):
+    def __init__(
+        self,
+        management_unit_id: int,
+        request: Request,
+        session: Session,
+        spray_program_id: Optional[int] = None,
+    ):
+        super().__init__(management_unit_id, request, session, spray_program_id)
+
+        # Programs with records here, for the program filter
+        self.spray_programs: List[SprayProgram] = (
+            spray_record_service.spray_history_programs(
+                session, management_unit_id=management_unit_id
+            )
         )
 
-        # Calculate completion percentage
-        self.completion_percentage = int(
-            (self.completed_records / self.total_records * 100)
-            if self.total_records > 0
-            else 0
+        # Statistics cover the whole (filtered) history, not just this page
+        stats = spray_record_service.spray_history_stats(
+            session,
+            management_unit_id=management_unit_id,
+            spray_program_id=spray_program_id,
         )
+        self.total_records = stats.total
+        self.completed_records = stats.completed
+        self.pending_records = stats.pending
+        self.completion_percentage = stats.completion_percentage
@@ -1,21 +1,27 @@
 from collections import defaultdict
 from typing import Dict, List, Optional
+from urllib.parse import urlencode
 
 from sqlalchemy.orm import Session
-from sqlmodel import select
 from starlette.requests import Request
 
 from data.user import UserRole
 from data.vineyard import ManagementUnit, Spray, SprayProgram, SprayRecord, Vineyard
+from services import spray_record_service
+from services.spray_record_service import HistoryCursor
 from viewmodels.shared.viewmodel import ViewModelBase
 
 
-class VineyardFullSprayHistoryViewModel(ViewModelBase):
+class VineyardFullSprayHistoryRecordsViewModel(ViewModelBase):
+    """One page of a vineyard's spray history, as served to "load more" """
+
     def __init__(
         self,
         vineyard_id: int,
         request: Request,
         session: Session,
+        spray_program_id: Optional[int] = None,
+        after: Optional[str] = None,
     ):
         super().__init__(request, session)
 
@@ -27,58 +33,30 @@ class VineyardFullSprayHistoryViewModel(ViewModelBase):
         if not self.vineyard:
             raise ValueError(f"Vineyard with ID {vineyard_id} not found")
 
-        # Get all management units for this vineyard
-        management_unit_ids = [mu.id for mu in self.vineyard.management_units]
-
-        if management_unit_ids:
-            # Get all spray records for all management units in this vineyard
-            self.spray_records: List[SprayRecord] = session.exec(
-                select(SprayRecord)
-                .where(SprayRecord.management_unit_id.in_(management_unit_ids))
-                .order_by(
-                    SprayRecord.date_completed.desc().nulls_last(),
-                    SprayRecord.date_created.desc(),
-                )
-            ).all()
-
-            # Get associated sprays and programs for the records
-            spray_ids = [record.spray_id for record in self.spray_records]
-            if spray_ids:
-                self.sprays: List[Spray] = session.exec(
-                    select(Spray).where(Spray.id.in_(spray_ids))
-                ).all()
-
-                program_ids = list(set(spray.spray_program_id for spray in self.sprays))
-                self.spray_programs: List[SprayProgram] = session.exec(
-                    select(SprayProgram)
-                    .where(SprayProgram.id.in_(program_ids))
-                    .order_by(
-                        SprayProgram.year_start.desc(), SprayProgram.date_created.desc()
-                    )
-                ).all()
-            else:
-                self.sprays = []
-                self.spray_programs = []
-
-            # Get management units that have records
-            mu_ids_with_records = list(
-                set(record.management_unit_id for record in self.spray_records)
-            )
-            self.management_units: List[ManagementUnit] = session.exec(
-                select(ManagementUnit).where(ManagementUnit.id.in_(mu_ids_with_records))
-            ).all()
-        else:
-            self.spray_records = []
-            self.sprays = []
-            self.spray_programs = []
-            self.management_units = []
-
-        # Create lookup dictionaries for efficient access
-        self.spray_lookup = {spray.id: spray for spray in self.sprays}
-        self.program_lookup = {program.id: program for program in self.spray_programs}
-        self.management_unit_lookup = {mu.id: mu for mu in self.management_units}
-
-        # Group records by program, then by management unit
+        self.spray_program_id = spray_program_id
+
+        page = spray_record_service.spray_history_page(
+            session,
+            vineyard_id=vineyard_id,
+            spray_program_id=spray_program_id,
+            after=HistoryCursor.decode(after) if after else None,
+        )
+        self.spray_records: List[SprayRecord] = page.records
+
+        # Create lookup dictionaries from the eagerly loaded relationships
+        self.spray_lookup: Dict[int, Spray] = {
+            record.spray_id: record.spray for record in self.spray_records
+        }
+        self.program_lookup: Dict[int, SprayProgram] = {
+            spray.spray_program_id: spray.spray_program
+            for spray in self.spray_lookup.values()
+        }
+        self.management_unit_lookup: Dict[int, ManagementUnit] = {
+            record.management_unit_id: record.management_unit
+            for record in self.spray_records
+        }
+
+        # Group this page's records by program, then by management unit
         # Structure: {program_id: {mu_id: [records]}}
         self.records_by_program_and_mu: Dict[int, Dict[int, List[SprayRecord]]] = (
             defaultdict(lambda: defaultdict(list))
@@ -90,29 +68,52 @@ class VineyardFullSprayHistoryViewModel(ViewModelBase):
                     record.management_unit_id
                 ].append(record)
 
-        # Create a sorted list of management unit IDs for each program
-        # Sorted by management unit name
-        self.sorted_mu_ids_by_program: Dict[int, List[int]] = {}
-        for program_id, mu_dict in self.records_by_program_and_mu.items():
-            # Sort MU IDs by the name of the management unit
-            sorted_ids = sorted(
-                mu_dict.keys(),
-                key=lambda mu_id: self.management_unit_lookup.get(mu_id).name
-                if self.management_unit_lookup.get(mu_id)
-                else "",
+        # Management unit IDs for each program in management unit sort order
+        self.sorted_mu_ids_by_program: Dict[int, List[int]] = {
+            program_id: sorted(
+                mu_dict, key=lambda mu_id: self.management_unit_lookup[mu_id].sort_key
+            )
+            for program_id, mu_dict in self.records_by_program_and_mu.items()
+        }
+
+        self.next_page_url: Optional[str] = None
+        if page.next_cursor:
+            params = {"after": page.next_cursor.encode()}
+            if spray_program_id is not None:
+                params["spray_program_id"] = spray_program_id
+            self.next_page_url = (
+                f"/vineyards/{vineyard_id}/full_spray_history/records?"
+                f"{urlencode(params)}"
+            )
+
+
+class VineyardFullSprayHistoryViewModel(VineyardFullSprayHistoryRecordsViewModel):
+    def __init__(
+        self,
+        vineyard_id: int,
+        request: Request,
+        session: Session,
+        spray_program_id: Optional[int] = None,
+    ):
+        super().__init__(vineyard_id, request, session, spray_program_id)
+
+        # Programs with records here, for the program filter
+        self.spray_programs: List[SprayProgram] = (
+            spray_record_service.spray_history_programs(
+                session, vineyard_id=vineyard_id
             )
-            self.sorted_mu_ids_by_program[program_id] = sorted_ids
+        )
 
-        # Calculate statistics
-        self.total_records = len(self.spray_records)
-        self.completed_records = len([r for r in self.spray_records if r.complete])
-        self.pending_records = len(
-            [r for r in self.spray_records if r.complete is False]
+        # Spray diary downloads follow the program filter
+        self.export_query = (
+            f"?spray_program_id={spray_program_id}" if spray_program_id else ""
         )
 
-        # Calculate completion percentage
-        self.completion_percentage = int(
-            (self.completed_records / self.total_records * 100)
-            if self.total_records > 0
-            else 0
+        # Statistics cover the whole (filtered) history, not just this page
+        stats = spray_record_service.spray_history_stats(
+            session, vineyard_id=vineyard_id, spray_program_id=spray_program_id
         )
+        self.total_records = stats.total
+        self.completed_records = stats.completed
+        self.pending_records = stats.pending
+        self.completion_percentage = stats.completion_percentage
@@ -1,17 +1,21 @@
 import datetime
-from typing import List
 
 from fastapi import Request
 from icecream import ic
 from sqlmodel import Session, select
 
-from data.user import User, UserRole
+from data.user import User
 from data.vineyard import (
     SprayChemical,
     SprayRecord,
     WindDirection,
 )
-from services import spray_record_service, user_service, vineyard_service
+from services import (
+    reference_data_service,
+    spray_record_service,
+    user_service,
+    vineyard_service,
+)
 from viewmodels.shared.viewmodel import ViewModelBase
 
 
@@ -58,10 +62,9 @@ class VineyardSprayRecordsEditSubmitViewModel(ViewModelBase):
         self.operator: User | None = user_service.get_user_by_id(
             self.session, self.operator_id
         )
-        self.operators: List[User] = user_service.get_users_by_role(
-            session=session, role=UserRole.OPERATOR
-        )
-        self.growth_stages = vineyard_service.all_growth_stages(session)
+        reference_data = reference_data_service.reference_data(session)
+        self.operators = reference_data.operators
+        self.growth_stages = reference_data.growth_stages
         self.chemicals = vineyard_service.get_spray_chemicals(self.spray_id, session)
         self.wind_directions = list(WindDirection)
         self.spray_records: list[SprayRecord] = (
@@ -1,13 +1,17 @@
 import datetime
-from typing import List
 
 from icecream import ic
 from sqlmodel import Session
 from starlette.requests import Request
 
-from data.user import User, UserRole
+from data.user import User
 from data.vineyard import SprayRecord, WindDirection
-from services import spray_record_service, user_service, vineyard_service
+from services import (
+    reference_data_service,
+    spray_record_service,
+    user_service,
+    vineyard_service,
+)
 from viewmodels.shared.viewmodel import ViewModelBase
 
 
@@ -27,9 +31,8 @@ class VineyardSprayRecordsFormEditViewModel(ViewModelBase):
         self.spray_record_id = spray_record_id
         self.request = request
         self.session = session
-        self.operators: List[User] = user_service.get_users_by_role(
-            session=session, role=UserRole.OPERATOR
-        )
+        reference_data = reference_data_service.reference_data(session)
+        self.operators = reference_data.operators
 
         self.edit = True
 
@@ -51,7 +54,7 @@ class VineyardSprayRecordsFormEditViewModel(ViewModelBase):
 
         self.date_completed = self.spray_record.date_completed.date()
 
-        self.growth_stages = vineyard_service.all_growth_stages(session)
+        self.growth_stages = reference_data.growth_stages
         ic(self.growth_stages)
         ic("################################################")
         ic(self.date_completed)
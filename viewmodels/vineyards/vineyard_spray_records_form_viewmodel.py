@@ -3,52 +3,41 @@ from decimal import Decimal
 from typing import List
 
 from icecream import ic
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from starlette.requests import Request
 
-from data.user import User, UserRole
-from data.vineyard import SprayRecord, WindDirection
-from services import spray_service, user_service, vineyard_service
-from viewmodels.shared.viewmodel import ViewModelBase
+from data.user import User
+from data.vineyard import Chemical, SprayRecord, WindDirection
+from services import (
+    reference_data_service,
+    spray_service,
+    vineyard_service,
+)
+from viewmodels.shared.viewmodel import AsyncViewModelBase
 
 
-class VineyardSprayRecordsFormViewModel(ViewModelBase):
+class VineyardSprayRecordsFormViewModel(AsyncViewModelBase):
     def __init__(
         self,
         vineyard_id: int,
         spray_id: int,
         request: Request,
-        session: Session,
+        session: AsyncSession,
     ):
         super().__init__(request, session)
-        self.operator: User | None = user_service.get_user_by_id(
-            self.session, self.user_id
-        )
+        self.operator: User | None = None
         self.vineyard_id = vineyard_id
         self.spray_id = spray_id
-        self.request = request
-        self.session = session
-        self.operators: List[User] = user_service.get_users_by_role(
-            session=session, role=UserRole.OPERATOR
-        )
+        self.operators = ()
 
         self.date_completed: datetime.date = datetime.date.today()
 
         self.edit = False
 
-        self.spray = spray_service.eagerly_get_spray_by_id(spray_id, session)
-
-        self.chemicals = vineyard_service.get_spray_chemicals(spray_id, session)
-        self.growth_stages = vineyard_service.all_growth_stages(session)
-        ic(self.growth_stages)
-        ic("################################################")
-        ic(self.date_completed)
-
-        self.spray_records: list[SprayRecord] = (
-            vineyard_service.eagerly_get_vineyard_spray_spray_records(
-                self.session, self.vineyard_id, spray_id
-            )
-        )
+        self.spray = None
+        self.chemicals: list[Chemical] = []
+        self.growth_stages = ()
+        self.spray_records: list[SprayRecord] = []
         self.wind_directions = list(WindDirection)
 
         self.operator_id: int | None = None
@@ -67,3 +56,23 @@ class VineyardSprayRecordsFormViewModel(ViewModelBase):
 
         ic(self.spray_start_time)
         ic(self.spray_finish_time)
+
+    async def load(self):
+        await super().load()
+        self.operator = self.user
+
+        reference_data = await reference_data_service.reference_data_async(self.session)
+        self.operators = reference_data.operators
+        self.growth_stages = reference_data.growth_stages
+
+        self.spray = await spray_service.eagerly_get_spray_by_id_async(
+            self.spray_id, self.session
+        )
+        self.chemicals = await vineyard_service.get_spray_chemicals_async(
+            self.spray_id, self.session
+        )
+        self.spray_records = (
+            await vineyard_service.eagerly_get_vineyard_spray_records_by_spray_async(
+                self.session, self.vineyard_id, [self.spray_id]
+            )
+        )[self.spray_id]
@@ -1,21 +1,24 @@
 import datetime
-from typing import List
 
 from fastapi import Request
-from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from data.user import User, UserRole
+from data.user import User
 from data.vineyard import (
-    SprayChemical,
+    Chemical,
     SprayRecord,
-    SprayRecordChemical,
     WindDirection,
 )
-from services import user_service, vineyard_service
-from viewmodels.shared.viewmodel import ViewModelBase
+from services import (
+    reference_data_service,
+    spray_record_service,
+    user_service,
+    vineyard_service,
+)
+from viewmodels.shared.viewmodel import AsyncViewModelBase
 
 
-class VineyardSprayRecordsSubmitViewModel(ViewModelBase):
+class VineyardSprayRecordsSubmitViewModel(AsyncViewModelBase):
     def __init__(
         self,
         vineyard_id: int,
@@ -32,7 +35,7 @@ class VineyardSprayRecordsSubmitViewModel(ViewModelBase):
         wind_direction: str | None,
         management_unit_ids: list[int] | None,
         request: Request,
-        session: Session,
+        session: AsyncSession,
     ):
         super().__init__(request, session)
 
@@ -51,22 +54,16 @@ class VineyardSprayRecordsSubmitViewModel(ViewModelBase):
         self.management_unit_ids = management_unit_ids
         self.form = {}
         self.wd_enum = None
-        self.operator: User | None = user_service.get_user_by_id(
-            self.session, self.operator_id
-        )
-        self.operators: List[User] = user_service.get_users_by_role(
-            session=session, role=UserRole.OPERATOR
-        )
-        self.growth_stages = vineyard_service.all_growth_stages(session)
-        self.chemicals = vineyard_service.get_spray_chemicals(spray_id, session)
+        self.operator: User | None = None
+        self.operators = ()
+        self.growth_stages = ()
+        self.chemicals: list[Chemical] = []
         self.wind_directions = list(WindDirection)
-        self.spray_records: list[SprayRecord] = (
-            vineyard_service.eagerly_get_vineyard_spray_spray_records(
-                self.session, self.vineyard_id, spray_id
-            )
-        )
+        self.spray_records: list[SprayRecord] = []
 
     async def load(self):
+        await super().load()
+        await self._load_form_data()
         self.form = await self.request.form()
 
         if not self.operator_id:
@@ -81,88 +78,67 @@ class VineyardSprayRecordsSubmitViewModel(ViewModelBase):
             except KeyError:
                 self.error = f"Invalid wind direction: {self.wind_direction}"
 
-        # Validate batch numbers
-        program_chems = self.session.exec(
-            select(SprayChemical).where(SprayChemical.spray_id == self.spray_id)
-        ).all()
-
-        for pc in program_chems:
-            key = f"batch_number_{pc.chemical_id}"
+        # Validate batch numbers for each chemical in the spray
+        for chemical in self.chemicals:
+            key = f"batch_number_{chemical.id}"
             if not self.form.get(key):
-                self.error = f"Missing batch number for {pc.chemical.name}"
+                self.error = f"Missing batch number for {chemical.name}"
                 return
 
-    def process_submission(self):
+    async def _load_form_data(self):
+        self.operator = await user_service.get_user_by_id_async(
+            self.session, self.operator_id
+        )
+        reference_data = await reference_data_service.reference_data_async(self.session)
+        self.operators = reference_data.operators
+        self.growth_stages = reference_data.growth_stages
+        self.chemicals = await vineyard_service.get_spray_chemicals_async(
+            self.spray_id, self.session
+        )
+        self.spray_records = (
+            await vineyard_service.eagerly_get_vineyard_spray_records_by_spray_async(
+                self.session, self.vineyard_id, [self.spray_id]
+            )
+        )[self.spray_id]
+
+    async def process_submission(self):
+        """Write the completed records"""
         if self.error:
             return  # Do not proceed if there's an error
 
-        # Fetch SprayChemicals
-        program_chems = self.session.exec(
-            select(SprayChemical).where(SprayChemical.spray_id == self.spray_id)
-        ).all()
-
         # Map chemical_id -> batch_number
         chem_batch_map = {
-            pc.chemical_id: self.form.get(f"batch_number_{pc.chemical_id}")
-            for pc in program_chems
+            chemical.id: self.form.get(f"batch_number_{chemical.id}")
+            for chemical in self.chemicals
         }
 
-        for mu_id in self.management_unit_ids:
-            spray_record = self.session.exec(
-                select(SprayRecord).where(
-                    SprayRecord.management_unit_id == int(mu_id),
-                    SprayRecord.spray_id == self.spray_id,
-                )
-            ).first()
-
-            if not spray_record:
-                continue
-
-            spray_record.operator_id = self.operator_id
-            spray_record.growth_stage_id = self.growth_stage_id
-            # spray_record.hours_taken = self.hours_taken
-            if self.spray_start_time:
-                spray_record.spray_start_time = datetime.datetime.combine(
-                    self.date_completed, self.spray_start_time
-                )
-            else:
-                spray_record.spray_start_time = self.spray_start_time
-
-            if self.spray_finish_time:
-                spray_record.spray_finish_time = datetime.datetime.combine(
-                    self.date_completed, self.spray_finish_time
-                )
-            else:
-                spray_record.spray_finish_time = self.spray_finish_time
-
-            spray_record.temperature = self.temperature
-            spray_record.relative_humidity = self.relative_humidity
-            spray_record.wind_speed = self.wind_speed
-            spray_record.wind_direction = self.wd_enum
-            spray_record.complete = True
-            spray_record.date_completed = self.date_completed
-
-            for chem_id, batch_number in chem_batch_map.items():
-                # Ensure no duplicates added
-                existing: SprayRecordChemical = self.session.exec(
-                    select(SprayRecordChemical).where(
-                        SprayRecordChemical.spray_record_id == spray_record.id,
-                        SprayRecordChemical.chemical_id == chem_id,
-                    )
-                ).first()
-
-                if existing:
-                    existing.batch_number = batch_number
-                    src = existing
-                else:
-                    src = SprayRecordChemical(
-                        spray_record_id=spray_record.id,
-                        chemical_id=chem_id,
-                        batch_number=batch_number,
-                    )
-
-                self.session.add(src)
-
-            self.session.add(spray_record)
-
-        self.session.commit()
+        try:
+            await spray_record_service.update_multiple_spray_records_async(
+                session=self.session,
+                spray_id=self.spray_id,
+                management_unit_ids=self.management_unit_ids,
+                operator_id=self.operator_id,
+                date_completed=self.date_completed,
+                growth_stage_id=self.growth_stage_id,
+                # hours_taken=self.hours_taken,
+                spray_start_time=self.spray_start_time,
+                spray_finish_time=self.spray_finish_time,
+                temperature=self.temperature,
+                relative_humidity=self.relative_humidity,
+                wind_speed=self.wind_speed,
+                wind_direction=self.wd_enum,
+                chem_batch_map=chem_batch_map,
+            )
+        except Exception as e:
+            self.error = f"Failed to update spray records: {e}"
+            # The rollback expired everything loaded so far, and an async
+            # session can't lazy load it back while the form renders
+            if self.user:
+                await self.session.refresh(self.user)
+            await self._load_form_data()
+            return
+
+        # The records were completed by a bulk UPDATE, so the loaded copies
+        # are stale; expired, they are refreshed when next queried
+        for spray_record in self.spray_records:
+            self.session.expire(spray_record)